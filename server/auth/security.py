@@ -34,6 +34,10 @@ async def get_current_user(
     db: AsyncSession = Depends(get_db)
 ) -> TokenData:
     """Get current authenticated user"""
+    return await authenticate_token(credentials.credentials, db)
+
+async def authenticate_token(token: str, db: AsyncSession) -> TokenData:
+    """Validate a JWT and return its user (also used where no Authorization header is available, e.g. WebSockets)"""
     # Import here to avoid circular import
     from database.crud import user_crud
     
@@ -44,7 +48,7 @@ async def get_current_user(
     )
     
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         role: str = payload.get("role")
         user_id: int = payload.get("user_id")
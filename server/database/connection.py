@@ -39,12 +39,42 @@ async def get_db():
 
 # Remove the duplicate get_async_session function - use get_db instead
 
+# Columns added to existing tables after their creation (create_all only creates missing tables)
+SCHEMA_UPGRADES = [
+    "ALTER TABLE transcriptions ADD COLUMN IF NOT EXISTS audio_ref VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_transcriptions_audio_ref ON transcriptions (audio_ref)",
+    "ALTER TABLE transcriptions ADD COLUMN IF NOT EXISTS audio_content_type TEXT",
+    # Transcript reads are per conversation in speaking order (rows without start_time sort as 0)
+    "CREATE INDEX IF NOT EXISTS ix_transcriptions_conversation_order ON transcriptions (conversation_id, (COALESCE(start_time, 0)), id)",
+    "ALTER TABLE conversations ADD COLUMN IF NOT EXISTS rolling_summary TEXT",
+    "ALTER TABLE conversations ADD COLUMN IF NOT EXISTS rolling_summary_at TIMESTAMP WITH TIME ZONE",
+    "ALTER TABLE transcriptions ADD COLUMN IF NOT EXISTS rolling_folded BOOLEAN NOT NULL DEFAULT FALSE",
+    # Rolling summary scans only look for rows not folded yet
+    "CREATE INDEX IF NOT EXISTS ix_transcriptions_unfolded ON transcriptions (conversation_id) WHERE NOT rolling_folded",
+    "ALTER TABLE conversations ADD COLUMN IF NOT EXISTS summary_started_at TIMESTAMP WITH TIME ZONE",
+    "ALTER TABLE conversation_summaries ADD COLUMN IF NOT EXISTS processing_timings TEXT",
+]
+
+# Enum values added after the type was created; ALTER TYPE ... ADD VALUE cannot
+# run inside a transaction block before PostgreSQL 12 (nor be used in the same one after)
+ENUM_UPGRADES = [
+    "ALTER TYPE conversationstatus ADD VALUE IF NOT EXISTS 'FAILED'",
+]
+
 async def init_db():
     """Initialize database tables"""
     try:
         from database.models import Base  
+        from sqlalchemy import text
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for statement in ENUM_UPGRADES:
+                await conn.execute(text(statement))
+        async with engine.begin() as conn:
+            for statement in SCHEMA_UPGRADES:
+                await conn.execute(text(statement))
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
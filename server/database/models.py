@@ -1,7 +1,7 @@
 # database/models.py - Added plain password storage
 from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum as SQLEnum, Text, ForeignKey, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from enum import Enum as PyEnum
 import datetime
@@ -96,7 +96,8 @@ class Room(Base):
 class ConversationStatus(PyEnum):
     ACTIVE = "active"
     COMPLETED = "completed"
-    PROCESSING = "processing"
+    PROCESSING = "processing"  # Ended; summary being generated in the background
+    FAILED = "failed"  # Summarization failed; ending it again retries
 
 class Conversation(Base):
     __tablename__ = "conversations"
@@ -108,10 +109,18 @@ class Conversation(Base):
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     ended_at = Column(DateTime(timezone=True), nullable=True)
     
+    # Running summary kept up to date while the conversation is active (SUMMARY_ROLLING)
+    rolling_summary = Column(Text, nullable=True)
+    rolling_summary_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Set when a worker claims the final summary; stale claims are retaken after a restart
+    summary_started_at = Column(DateTime(timezone=True), nullable=True)
+    
     # Relationships
     room = relationship("Room", back_populates="conversations")
     transcriptions = relationship("Transcription", back_populates="conversation")
-    summaries = relationship("ConversationSummary", back_populates="conversation")
+    # Newest first: retried or regenerated summaries leave older rows behind
+    summaries = relationship("ConversationSummary", back_populates="conversation", order_by="ConversationSummary.id.desc()")
     
     def __init__(self, **kwargs):
         if 'conversation_id' not in kwargs:
@@ -131,7 +140,10 @@ class Transcription(Base):
     participant_name = Column(String(100), nullable=False)
     
     # Audio data
-    audio_chunk = Column(LargeBinary, nullable=True)  # Store small audio chunks
+    # Deferred: loaded only when accessed, so listing transcripts never pulls audio
+    audio_chunk = deferred(Column(LargeBinary, nullable=True))  # Legacy inline audio, see scripts/migrate_audio_blobs.py
+    audio_ref = Column(String(64), nullable=True, index=True)  # Content hash in the blob store
+    audio_content_type = Column(Text, nullable=True)  # As uploaded; raw PCM cannot be decoded without it
     audio_duration = Column(Integer, nullable=True)  # Duration in seconds
     
     # Transcription results
@@ -147,10 +159,55 @@ class Transcription(Base):
     # Metadata
     processing_time = Column(Integer, nullable=True)  # Processing time in ms
     model_version = Column(String(50), default="wav2vec2-indonesian")
+    rolling_folded = Column(Boolean, default=False, server_default="false", nullable=False)  # Already in Conversation.rolling_summary
     
     # Relationships
     conversation = relationship("Conversation", back_populates="transcriptions")
 
+class JobStatus(PyEnum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class TranscriptionJob(Base):
+    __tablename__ = "transcription_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(50), unique=True, index=True, nullable=False)
+    conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False, index=True)
+    participant_identity = Column(String(100), nullable=False)
+    participant_name = Column(String(100), nullable=False)
+    start_time = Column(Integer, nullable=True)  # Seconds from conversation start
+    
+    # Uploaded audio, cleared once the job has finished
+    audio_data = deferred(Column(LargeBinary, nullable=True))
+    content_type = Column(String(255), nullable=True)
+    audio_duration = Column(Integer, nullable=True)  # Duration in seconds
+    store_audio = Column(Boolean, default=True, nullable=False)
+    
+    status = Column(SQLEnum(JobStatus), default=JobStatus.PENDING, nullable=False, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+    transcription_id = Column(Integer, ForeignKey("transcriptions.id"), nullable=True)
+    submitted_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Relationships
+    transcription = relationship("Transcription")
+    
+    def __init__(self, **kwargs):
+        if 'job_id' not in kwargs:
+            kwargs['job_id'] = self.generate_job_id()
+        super().__init__(**kwargs)
+    
+    @staticmethod
+    def generate_job_id() -> str:
+        return str(uuid.uuid4()).replace('-', '')
+
 class ConversationSummary(Base):
     __tablename__ = "conversation_summaries"
     
@@ -172,6 +229,7 @@ class ConversationSummary(Base):
     model_used = Column(String(100), nullable=False)  # LLM model used for summarization
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     processing_time = Column(Integer, nullable=True)  # Processing time in ms
+    processing_timings = Column(Text, nullable=True)  # JSON string of per-stage LLM wall times in ms
     
     # Relationships
     conversation = relationship("Conversation", back_populates="summaries")
\ No newline at end of file
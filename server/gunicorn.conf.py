@@ -0,0 +1,61 @@
+# gunicorn.conf.py - Multi-worker deployment of the API
+#
+#     gunicorn -c gunicorn.conf.py main:app
+#
+# With STT_PRELOAD=true the Wav2Vec2 weights are loaded once in the master
+# before fork, so every worker maps the same physical pages instead of
+# holding a private copy. Compare per-worker unique memory (USS) in the
+# post_worker_init log lines, GET /stt/stats, or:
+#     python -m services.process_memory <worker pid> ...
+
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+stt_preload = os.getenv("STT_PRELOAD", "false").lower() == "true"
+
+# Import the app (and its STT service instance) in the master
+preload_app = stt_preload
+
+
+def _stt_service():
+    from routes.converstation import stt_service
+    return stt_service
+
+
+def when_ready(server):
+    """Runs in the master before the first worker is forked"""
+    if not stt_preload:
+        return
+
+    service = _stt_service()
+    preload = getattr(service, "preload", None)
+    if preload is None:
+        # STT_MODE=workers: the model lives in the inference server
+        server.log.info("STT preload skipped: inference runs in the STT worker pool")
+        return
+
+    preload()
+
+    # Move everything loaded so far out of the GC's reach so collections in
+    # the workers do not touch (and copy) the shared object pages
+    gc.freeze()
+
+    from services.process_memory import format_process_memory, get_process_memory
+    server.log.info(f"STT model preloaded in master ({format_process_memory(get_process_memory())})")
+
+
+def post_fork(server, worker):
+    if stt_preload:
+        after_fork = getattr(_stt_service(), "after_fork", None)
+        if after_fork is not None:
+            after_fork()
+
+
+def post_worker_init(worker):
+    from services.process_memory import format_process_memory, get_process_memory
+    worker.log.info(f"Worker ready ({format_process_memory(get_process_memory())})")
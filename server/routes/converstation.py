@@ -1,39 +1,243 @@
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form, Header, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.routing import APIRoute
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update, insert, tuple_
 from sqlalchemy.orm import selectinload
+import asyncio
+import base64
 import logging
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import json
+import time
 from datetime import datetime
 
+from services.admission import AdmissionController, AdmissionRejected
+from services.audio_formats import PCMStreamDecoder, is_wav, is_webm, parse_pcm_format
+from services.blob_store import get_blob_store
+from services.llm_cache import get_llm_cache
+from services.conversation_summaries import ConversationSummaryRunner
+from services.rolling_summaries import RollingSummaryRunner
 from services.speech_to_text import IndonesianSTTService
+from services.stt_streaming import StreamingTranscriber, TranscriptSegment
+from services.stt_worker_pool import STTWorkerPool
+from services.stream_decoders import StreamDecoderRegistry
 from services.summarization import ConversationSummarizationService
-from database.models import Conversation, Transcription, ConversationSummary, Room, ConversationStatus
-from database.connection import get_db
-from auth.security import require_user_or_admin
+from services.transcription_jobs import MAX_STORED_AUDIO_BYTES, TranscriptionJobRunner
+from database.models import Conversation, Transcription, ConversationSummary, Room, ConversationStatus, TranscriptionJob, JobStatus
+from database.connection import get_db, AsyncSessionLocal
+from auth.security import authenticate_token, require_user_or_admin
 from auth.schemas import TokenData
 import os
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+
+# Uploads that take an STT admission slot (sync mode only for single chunks)
+_BULK_UPLOAD = "/conversation/{conversation_id}/transcribe/bulk"
+_ADMITTED_UPLOADS = {
+    "/conversation/{conversation_id}/transcribe",
+    _BULK_UPLOAD
+}
+# Bulk bodies are buffered whole by form parsing, so their size is capped up front
+STT_BULK_MAX_BYTES = int(float(os.getenv("STT_BULK_MAX_MB", "64")) * 1024 * 1024)
+
+def _limit_body(receive, max_bytes: int):
+    """Wrap an ASGI receive so the body is refused with 413 once it exceeds max_bytes"""
+    received = 0
+    
+    async def limited_receive():
+        nonlocal received
+        message = await receive()
+        if message["type"] == "http.request":
+            received += len(message.get("body", b""))
+            if received > max_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Bulk uploads are limited to {max_bytes // (1024 * 1024)} MB"
+                )
+        return message
+    
+    return limited_receive
+
+class _AdmissionCheckedRoute(APIRoute):
+    """Turn uploads away with 429 while the STT queue is full, before FastAPI reads the form
+    
+    Dependencies (and so admit_transcription) only run once the whole
+    multipart body has been received and parsed; this check spares that
+    work when the request would be rejected anyway. Bulk uploads are also
+    held to STT_BULK_MAX_BYTES while their body is read, since their chunks
+    are only admitted one by one after parsing.
+    """
+    
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        if self.path not in _ADMITTED_UPLOADS or "POST" not in self.methods:
+            return handler
+        
+        async def checked_handler(request: Request):
+            if request.query_params.get("mode", "sync") != "async":
+                try:
+                    stt_admission.check_capacity()
+                except AdmissionRejected as e:
+                    logger.warning(f"Rejected transcription upload before reading it: {e.reason}")
+                    return JSONResponse(
+                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                        content={"detail": "Transcription queue is full"},
+                        headers={"Retry-After": str(e.retry_after)}
+                    )
+            if self.path == _BULK_UPLOAD:
+                declared = request.headers.get("content-length", "")
+                if declared.isdigit() and int(declared) > STT_BULK_MAX_BYTES:
+                    return JSONResponse(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        content={"detail": f"Bulk uploads are limited to {STT_BULK_MAX_BYTES // (1024 * 1024)} MB"}
+                    )
+                # Chunked bodies declare no length; count them as they arrive
+                request = Request(request.scope, _limit_body(request.receive, STT_BULK_MAX_BYTES), request._send)
+            return await handler(request)
+        
+        return checked_handler
+
+router = APIRouter(route_class=_AdmissionCheckedRoute)
 
 # Initialize services
-stt_service = IndonesianSTTService()
+# STT_MODE=workers sends transcription to the dedicated inference server
+if os.getenv("STT_MODE", "inprocess") == "workers":
+    stt_service = STTWorkerPool()
+else:
+    stt_service = IndonesianSTTService()
+# Bounded, per-user fair queue in front of chunk transcription
+stt_admission = AdmissionController()
+async def _store_decoder_tail(key, context, samples, offset_s: float):
+    """Transcribe and store the end of a WebM recording flushed from its stream decoder
+    
+    Takes an STT admission slot as the uploader, like the chunks of the stream did.
+    """
+    if not context:
+        return
+    try:
+        ticket = await stt_admission.acquire(context["user"])
+    except AdmissionRejected as e:
+        logger.warning(f"Dropped the final {len(samples) / 16000:.1f}s of WebM stream {key}: {e.reason}")
+        return
+    try:
+        text, confidence, processing_time = await stt_service.transcribe_samples(samples)
+    finally:
+        stt_admission.release(ticket)
+    if not text.strip():
+        return
+    start_time = int(context["start_time"]) + int(offset_s)
+    duration = _estimate_duration(b"", samples)
+    async with AsyncSessionLocal() as db:
+        db.add(Transcription(
+            conversation_id=context["conversation_pk"],
+            participant_identity=key[1],
+            participant_name=context["participant_name"],
+            transcribed_text=text,
+            confidence_score=str(confidence),
+            start_time=start_time,
+            end_time=start_time + duration,
+            audio_duration=duration,
+            processing_time=int(processing_time),
+            model_version=stt_service.model_version
+        ))
+        await db.commit()
+    logger.info(f"Stored the final {len(samples) / 16000:.1f}s of WebM stream {key}")
+
+# Browser MediaRecorder (WebM/Opus) chunks are decoded by one persistent decoder per participant stream;
+# the end of each recording is flushed and stored when its decoder closes
+stream_decoders = StreamDecoderRegistry(on_tail=_store_decoder_tail)
+# mode=async uploads are transcribed by background workers
+transcription_jobs = TranscriptionJobRunner(stt_service, AsyncSessionLocal)
 summarization_service = ConversationSummarizationService(
     api_key=os.getenv("OPENAI_API_KEY", ""),
     model=os.getenv("LLM_MODEL", "gpt-3.5-turbo")
 )
+# Ended conversations are summarized by background workers
+summary_jobs = ConversationSummaryRunner(summarization_service, AsyncSessionLocal)
+# SUMMARY_ROLLING=true keeps a running summary of active conversations
+rolling_summaries = RollingSummaryRunner(summarization_service, AsyncSessionLocal)
 
-@router.on_event("startup")
-async def startup_event():
-    """Initialize STT service on startup"""
+# Keep references to fire-and-forget tasks so they are not garbage collected
+_background_tasks = set()
+
+async def _warm_up_stt():
+    """Load the STT model without holding up application startup"""
     try:
         await stt_service.initialize()
         logger.info("Speech-to-text service initialized")
     except Exception as e:
         logger.error(f"Failed to initialize STT service: {e}")
 
+async def admit_transcription(mode: str = "sync", current_user: TokenData = Depends(require_user_or_admin)):
+    """Hold an STT slot for the request, or reject with 429 when the queue is full"""
+    if mode == "async":
+        # Background jobs are bounded by the job workers instead
+        yield current_user
+        return
+    try:
+        ticket = await stt_admission.acquire(str(current_user.user_id or current_user.username))
+    except AdmissionRejected as e:
+        logger.warning(f"Rejected transcription for {current_user.username}: {e.reason}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Transcription queue is full" if e.reason == "queue_full" else "Too many queued transcriptions for this user",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    try:
+        yield current_user
+    finally:
+        stt_admission.release(ticket)
+
+def _estimate_duration(audio_data: bytes, samples=None) -> int:
+    """Chunk duration in whole seconds (exact for decoded samples, estimated from size otherwise)"""
+    if samples is not None:
+        return max(1, round(len(samples) / 16000))
+    return max(1, len(audio_data) // 16000)  # Rough estimate
+
+@router.on_event("startup")
+async def startup_event():
+    """Schedule STT warm-up according to STT_WARMUP
+    
+    background (default): load in a background task once the server is up
+    eager: load before the server starts accepting requests
+    lazy: load on the first transcription request
+    """
+    # Resume transcription jobs left over from before a restart
+    transcription_jobs.start()
+    try:
+        await transcription_jobs.recover()
+    except Exception as e:
+        logger.error(f"Failed to recover transcription jobs: {e}")
+    
+    # Resume summaries of conversations still PROCESSING
+    summary_jobs.start()
+    try:
+        await summary_jobs.recover()
+    except Exception as e:
+        logger.error(f"Failed to recover summary jobs: {e}")
+    rolling_summaries.start()
+    stream_decoders.start()
+    
+    warmup = os.getenv("STT_WARMUP", "background").lower()
+    if warmup == "eager":
+        await _warm_up_stt()
+    elif warmup == "background":
+        task = asyncio.get_running_loop().create_task(_warm_up_stt())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    else:
+        logger.info("STT model will be loaded on first transcription request")
+
+@router.on_event("shutdown")
+async def shutdown_event():
+    """Stop the STT worker pool, job workers and stream decoders on shutdown"""
+    await transcription_jobs.stop()
+    await summary_jobs.stop()
+    await rolling_summaries.stop()
+    await stream_decoders.stop()
+    stt_service.shutdown()
+
 @router.post("/conversation/start/{room_id}")
 async def start_conversation_recording(
     room_id: str,  # Room ID or room name
@@ -110,10 +314,28 @@ async def transcribe_audio_chunk(
     participant_identity: str,
     start_time: int,  # Seconds from conversation start
     audio_file: UploadFile = File(...),
-    current_user: TokenData = Depends(require_user_or_admin),
+    mode: str = "sync",  # "async": store the chunk and return 202 with a job id
+    audio_format: Optional[str] = Header(None, alias="X-Audio-Format"),
+    current_user: TokenData = Depends(admit_transcription),
     db: AsyncSession = Depends(get_db)
 ):
-    """Transcribe audio chunk and store result"""
+    """Transcribe audio chunk and store result
+    
+    Requests beyond the STT queue depth are rejected with 429 and Retry-After.
+    With mode=async the chunk is queued for background transcription and the
+    response is 202 with a job id to poll at /transcription-jobs/{job_id}.
+    Raw PCM can be sent with a content type (or X-Audio-Format header) such as
+    'audio/pcm; encoding=s16le; rate=16000; channels=1' to skip decoding.
+    MediaRecorder output ('audio/webm') can be uploaded chunk by chunk as recorded:
+    only the first chunk of a recording carries the WebM header, later ones are
+    decoded by the same per-participant stream decoder.
+    """
+    if mode not in ("sync", "async"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="mode must be 'sync' or 'async'"
+        )
+    
     try:
         # Find conversation
         result = await db.execute(
@@ -139,8 +361,67 @@ async def transcribe_audio_chunk(
                 detail="Empty audio file"
             )
         
+        content_type = audio_format or audio_file.content_type
+        streamed_webm = is_webm(audio_data, content_type)
+        
+        if streamed_webm:
+            # Fragments must pass through the stream decoder in upload order, so decode now
+            try:
+                samples = await stream_decoders.decode(
+                    (conversation_id, participant_identity),
+                    audio_data,
+                    context={
+                        "conversation_pk": conversation.id,
+                        "participant_name": participant_name,
+                        "start_time": start_time,
+                        "user": str(current_user.user_id or current_user.username)
+                    }
+                )
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e)
+                )
+        
+        if mode == "async":
+            if streamed_webm:
+                job_audio = samples.tobytes()
+                job_content_type = "audio/pcm; encoding=f32le; rate=16000; channels=1"
+            else:
+                job_audio = audio_data
+                job_content_type = content_type
+            
+            job = await transcription_jobs.submit(
+                db,
+                conversation_pk=conversation.id,
+                participant_identity=participant_identity,
+                participant_name=participant_name,
+                start_time=start_time,
+                audio_data=job_audio,
+                content_type=job_content_type,
+                audio_duration=_estimate_duration(audio_data, samples if streamed_webm else None),
+                store_audio=not streamed_webm,
+                submitted_by=current_user.user_id
+            )
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={
+                    "job_id": job.job_id,
+                    "conversation_id": conversation_id,
+                    "status": JobStatus.PENDING.value,
+                    "participant": participant_name
+                },
+                headers={"Location": f"/transcription-jobs/{job.job_id}"}
+            )
+        
         # Transcribe audio
-        transcribed_text, confidence, processing_time = await stt_service.transcribe_audio(audio_data)
+        if streamed_webm:
+            transcribed_text, confidence, processing_time = await stt_service.transcribe_samples(samples)
+        else:
+            transcribed_text, confidence, processing_time = await stt_service.transcribe_audio(
+                audio_data,
+                content_type=content_type
+            )
         
         if not transcribed_text.strip():
             logger.info(f"Empty transcription for {participant_name}")
@@ -151,7 +432,7 @@ async def transcribe_audio_chunk(
             }
         
         # Calculate audio duration (estimate based on file size)
-        estimated_duration = max(1, len(audio_data) // 16000)  # Rough estimate
+        estimated_duration = _estimate_duration(audio_data, samples if streamed_webm else None)
         
         # Store transcription
         transcription = Transcription(
@@ -163,12 +444,15 @@ async def transcribe_audio_chunk(
             start_time=start_time,
             end_time=start_time + estimated_duration,
             audio_duration=estimated_duration,
-            processing_time=int(processing_time)
+            processing_time=int(processing_time),
+            model_version=stt_service.model_version
         )
         
         # Optionally store audio chunk (be careful with storage space)
-        if len(audio_data) < 1024 * 1024:  # Only store chunks < 1MB
-            transcription.audio_chunk = audio_data
+        # Headerless WebM fragments cannot be decoded on their own, so they are not kept
+        if len(audio_data) < MAX_STORED_AUDIO_BYTES and not streamed_webm:  # Only store chunks < 1MB
+            transcription.audio_ref = await get_blob_store().put_async(audio_data)
+            transcription.audio_content_type = content_type
         
         db.add(transcription)
         await db.commit()
@@ -195,126 +479,619 @@ async def transcribe_audio_chunk(
             detail="Failed to transcribe audio"
         )
 
-@router.post("/conversation/{conversation_id}/end")
-async def end_conversation_and_summarize(
+@router.post("/conversation/{conversation_id}/transcribe/bulk")
+async def transcribe_audio_chunks_bulk(
     conversation_id: str,
+    chunks: List[UploadFile] = File(...),
+    metadata: str = Form(...),  # JSON list, one entry per chunk in upload order
     current_user: TokenData = Depends(require_user_or_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    """End conversation and generate summary"""
+    """Transcribe many buffered audio chunks (e.g. replayed after a reconnect) in one request
+    
+    metadata is a JSON array aligned with the uploaded chunks, each entry holding
+    participant_name, participant_identity, start_time and optionally content_type.
+    Chunks are transcribed concurrently, so they share batched forward passes, and
+    all resulting transcriptions are inserted with a single multi-row INSERT.
+    Each chunk takes its own STT admission slot, so a large upload waits its turn
+    like that many single uploads would. A chunk that fails (or that the full
+    queue turns away) does not fail the others; see each result's status. The
+    request is rejected with 429 only when no chunk could be admitted.
+    """
+    max_chunks = int(os.getenv("STT_BULK_MAX_CHUNKS", "200"))
     try:
-        # Find active conversation
+        entries = json.loads(metadata)
+    except ValueError:
+        entries = None
+    if not isinstance(entries, list) or len(entries) != len(chunks):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="metadata must be a JSON array with one entry per chunk"
+        )
+    if len(chunks) > max_chunks:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {max_chunks} chunks per request"
+        )
+    for entry in entries:
+        if not isinstance(entry, dict) or not all(key in entry for key in ("participant_name", "participant_identity", "start_time")):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Each metadata entry needs participant_name, participant_identity and start_time"
+            )
+        try:
+            entry["start_time"] = int(entry["start_time"])
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start_time must be an integer number of seconds"
+            )
+    
+    try:
+        # Find conversation
         result = await db.execute(
-            select(Conversation)
-            .options(selectinload(Conversation.transcriptions))
-            .where(
+            select(Conversation.id).where(
                 Conversation.conversation_id == conversation_id,
                 Conversation.status == ConversationStatus.ACTIVE
             )
         )
-        conversation = result.scalar_one_or_none()
+        conversation_pk = result.scalar_one_or_none()
         
-        if not conversation:
+        if conversation_pk is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Active conversation not found"
             )
         
-        # Update conversation status
-        conversation.status = ConversationStatus.PROCESSING
-        conversation.ended_at = datetime.utcnow()
-        await db.commit()
+        items = []
+        for audio_file, entry in zip(chunks, entries):
+            audio_data = await audio_file.read()
+            items.append({
+                "entry": entry,
+                "audio_data": audio_data,
+                "content_type": entry.get("content_type") or audio_file.content_type,
+                "samples": None,
+                "error": None if audio_data else "Empty audio file"
+            })
+        
+        # WebM fragments go through their participant's stream decoder in upload order
+        for item in items:
+            if item["error"] is None and is_webm(item["audio_data"], item["content_type"]):
+                try:
+                    entry = item["entry"]
+                    item["samples"] = await stream_decoders.decode(
+                        (conversation_id, entry["participant_identity"]),
+                        item["audio_data"],
+                        context={
+                            "conversation_pk": conversation_pk,
+                            "participant_name": entry["participant_name"],
+                            "start_time": entry["start_time"],
+                            "user": str(current_user.user_id or current_user.username)
+                        }
+                    )
+                except ValueError as e:
+                    item["error"] = str(e)
+        
+        # Never queue more chunks at once than the caller's share of the admission queue
+        user = str(current_user.user_id or current_user.username)
+        in_flight = asyncio.Semaphore(stt_admission.max_per_user)
         
-        # Check if we have transcriptions
-        if not conversation.transcriptions:
-            conversation.status = ConversationStatus.COMPLETED
+        async def transcribe_item(item):
+            async with in_flight:
+                ticket = await stt_admission.acquire(user)
+                try:
+                    if item["samples"] is not None:
+                        return await stt_service.transcribe_samples(item["samples"])
+                    return await stt_service.transcribe_audio(item["audio_data"], content_type=item["content_type"])
+                finally:
+                    stt_admission.release(ticket)
+        
+        # Submitted together so the batch scheduler packs them into shared forward passes
+        pending = [item for item in items if item["error"] is None]
+        outcomes = await asyncio.gather(*[transcribe_item(item) for item in pending], return_exceptions=True)
+        
+        rejected = [outcome for outcome in outcomes if isinstance(outcome, AdmissionRejected)]
+        if pending and len(rejected) == len(pending):
+            logger.warning(f"Rejected bulk transcription for {current_user.username}: {rejected[0].reason}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Transcription queue is full",
+                headers={"Retry-After": str(max(outcome.retry_after for outcome in rejected))}
+            )
+        
+        rows = []
+        for item, outcome in zip(pending, outcomes):
+            if isinstance(outcome, AdmissionRejected):
+                item["error"] = "Transcription queue is full"
+                continue
+            if isinstance(outcome, Exception):
+                item["error"] = str(outcome) or "Transcription failed"
+                continue
+            item["text"], item["confidence"], item["processing_time"] = outcome
+            if not item["text"].strip():
+                continue
+            
+            entry = item["entry"]
+            duration = _estimate_duration(item["audio_data"], item["samples"])
+            start_time = entry["start_time"]
+            row = {
+                "conversation_id": conversation_pk,
+                "participant_identity": entry["participant_identity"],
+                "participant_name": entry["participant_name"],
+                "transcribed_text": item["text"],
+                "confidence_score": str(item["confidence"]),
+                "start_time": start_time,
+                "end_time": start_time + duration,
+                "audio_duration": duration,
+                "processing_time": int(item["processing_time"]),
+                "model_version": stt_service.model_version,
+                "audio_ref": None,
+                "audio_content_type": None
+            }
+            item["row"] = len(rows)
+            rows.append(row)
+        
+        # Same storage rule as single uploads: small, self-contained chunks only
+        stored = [
+            item for item in items
+            if "row" in item and item["samples"] is None and len(item["audio_data"]) < MAX_STORED_AUDIO_BYTES
+        ]
+        blob_store = get_blob_store()
+        refs = await asyncio.gather(*[blob_store.put_async(item["audio_data"]) for item in stored])
+        for item, ref in zip(stored, refs):
+            rows[item["row"]]["audio_ref"] = ref
+            rows[item["row"]]["audio_content_type"] = item["content_type"]
+        
+        # One multi-row INSERT ... RETURNING and one commit for the whole upload
+        transcription_ids = []
+        if rows:
+            result = await db.execute(
+                insert(Transcription).returning(Transcription.id, sort_by_parameter_order=True),
+                rows
+            )
+            transcription_ids = result.scalars().all()
             await db.commit()
-            return {
-                "conversation_id": conversation_id,
-                "status": "completed",
-                "message": "No transcriptions to summarize"
+        
+        results = []
+        for index, item in enumerate(items):
+            entry = item["entry"]
+            outcome = {
+                "index": index,
+                "participant": entry["participant_name"],
+                "start_time": entry["start_time"]
             }
+            if item["error"] is not None:
+                outcome.update(status="failed", error=item["error"])
+            elif "row" in item:
+                outcome.update(
+                    status="stored",
+                    transcription_id=transcription_ids[item["row"]],
+                    transcription=item["text"],
+                    confidence=item["confidence"],
+                    processing_time=item["processing_time"]
+                )
+            else:
+                outcome.update(status="empty", transcription="")
+            results.append(outcome)
         
-        # Prepare transcription data for summarization
-        transcription_data = []
-        for trans in conversation.transcriptions:
-            transcription_data.append({
-                "participant_name": trans.participant_name,
-                "participant_identity": trans.participant_identity,
-                "transcribed_text": trans.transcribed_text,
-                "confidence_score": trans.confidence_score,
-                "timestamp": trans.timestamp.isoformat(),
-                "start_time": trans.start_time or 0,
-                "end_time": trans.end_time or 0
-            })
+        logger.info(f"Bulk transcription for {conversation_id}: {len(rows)} stored of {len(items)} chunks")
         
-        # Calculate conversation duration
-        duration = int((conversation.ended_at - conversation.started_at).total_seconds())
+        return {
+            "conversation_id": conversation_id,
+            "total_chunks": len(items),
+            "stored": len(rows),
+            "failed": sum(1 for item in items if item["error"] is not None),
+            "results": results
+        }
         
-        # Generate summary
-        summary_data = await summarization_service.summarize_conversation(
-            transcriptions=transcription_data,
-            conversation_duration=duration,
-            language="indonesian"
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Bulk transcription error: {e}")
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to transcribe audio chunks"
         )
+
+@router.get("/transcription-jobs/{job_id}")
+async def get_transcription_job(
+    job_id: str,
+    wait: float = 0,  # Long-poll: seconds to wait for the job to finish (max 60)
+    current_user: TokenData = Depends(require_user_or_admin)
+):
+    """Get the status and result of an async transcription job"""
+    deadline = time.monotonic() + max(0.0, min(wait, 60.0))
+    try:
+        while True:
+            # A fresh short session per check, so long-polls do not hold a connection
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(TranscriptionJob, Conversation.conversation_id, Transcription)
+                    .join(Conversation, TranscriptionJob.conversation_id == Conversation.id)
+                    .outerjoin(Transcription, TranscriptionJob.transcription_id == Transcription.id)
+                    .where(TranscriptionJob.job_id == job_id)
+                )
+                row = result.one_or_none()
+            
+            if row is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Transcription job not found"
+                )
+            
+            job, public_conversation_id, transcription = row
+            remaining = deadline - time.monotonic()
+            if job.status in (JobStatus.COMPLETED, JobStatus.FAILED) or remaining <= 0:
+                break
+            
+            # Woken as soon as the job finishes in this process; re-checked every second otherwise
+            await transcription_jobs.wait(job.id, min(remaining, 1.0))
         
-        # Store summary
-        conversation_summary = ConversationSummary(
-            conversation_id=conversation.id,
-            summary_text=summary_data["summary"],
-            key_points=json.dumps(summary_data["key_points"], ensure_ascii=False),
-            action_items=json.dumps(summary_data["action_items"], ensure_ascii=False),
-            participants_summary=json.dumps(summary_data["participants_analysis"], ensure_ascii=False),
-            total_duration=duration,
-            total_words=summary_data["statistics"]["total_words"],
-            model_used=f"{summarization_service.model}"
+        response = {
+            "job_id": job.job_id,
+            "conversation_id": public_conversation_id,
+            "status": job.status.value,
+            "participant_name": job.participant_name,
+            "participant_identity": job.participant_identity,
+            "start_time": job.start_time,
+            "attempts": job.attempts,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+            "error": job.error,
+            "transcription": None
+        }
+        if transcription is not None:
+            response["transcription"] = {
+                "id": transcription.id,
+                "text": transcription.transcribed_text,
+                "confidence": float(transcription.confidence_score) if transcription.confidence_score else None,
+                "processing_time": transcription.processing_time
+            }
+        elif job.status == JobStatus.COMPLETED:
+            response["message"] = "No speech detected in audio"
+        return response
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get transcription job error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve transcription job"
+        )
+
+async def _store_stream_segment(
+    conversation_pk: int,
+    participant_identity: str,
+    participant_name: str,
+    stream_start_time: int,
+    segment: TranscriptSegment
+) -> int:
+    """Persist a final streaming segment on its own short-lived session"""
+    duration = max(1, round(segment.end - segment.start))
+    start_time = stream_start_time + int(segment.start)
+    async with AsyncSessionLocal() as db:
+        transcription = Transcription(
+            conversation_id=conversation_pk,
+            participant_identity=participant_identity,
+            participant_name=participant_name,
+            transcribed_text=segment.text,
+            confidence_score=str(0.85),
+            start_time=start_time,
+            end_time=start_time + duration,
+            audio_duration=duration,
+            processing_time=int(segment.processing_time),
+            model_version=stt_service.model_version
+        )
+        db.add(transcription)
+        await db.commit()
+        return transcription.id
+
+@router.websocket("/conversation/{conversation_id}/stream")
+async def stream_transcription(
+    websocket: WebSocket,
+    conversation_id: str,
+    participant_name: str,
+    participant_identity: str,
+    token: str,
+    start_time: int = 0,  # Seconds from conversation start at which the stream begins
+    audio_format: str = "audio/pcm; encoding=s16le; rate=16000; channels=1"
+):
+    """Real-time transcription of a continuous PCM stream
+    
+    The client sends binary frames of raw 16 kHz PCM (layout given by audio_format)
+    and a text frame {"type": "stop"} or a close when done. The server replies with
+    {"type": "partial", "text", "stable_text", "start", "end"} while a segment is
+    open and {"type": "final", ..., "transcription_id"} once it is stored. Only
+    finals are persisted. Browsers cannot set headers on WebSockets, so the JWT
+    is passed as the token query parameter.
+    """
+    # Authenticate and resolve the conversation before accepting the socket
+    try:
+        async with AsyncSessionLocal() as db:
+            current_user = await authenticate_token(token, db)
+            require_user_or_admin(current_user)
+            
+            result = await db.execute(
+                select(Conversation.id).where(
+                    Conversation.conversation_id == conversation_id,
+                    Conversation.status == ConversationStatus.ACTIVE
+                )
+            )
+            conversation_pk = result.scalar_one_or_none()
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+    
+    if conversation_pk is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Active conversation not found")
+        return
+    
+    try:
+        pcm_format = parse_pcm_format(audio_format)
+    except ValueError as e:
+        pcm_format = None
+        logger.info(f"Rejected stream format '{audio_format}': {e}")
+    if pcm_format is None or pcm_format.sample_rate != 16000:
+        await websocket.close(
+            code=status.WS_1003_UNSUPPORTED_DATA,
+            reason="audio_format must be 16 kHz raw PCM (audio/pcm)"
         )
+        return
+    
+    await websocket.accept()
+    logger.info(f"Streaming transcription started for {participant_name} in {conversation_id}")
+    
+    decoder = PCMStreamDecoder(pcm_format)
+    stream = StreamingTranscriber(stt_service.transcribe_array)
+    audio_ready = asyncio.Event()
+    stream_ended = False
+    client_connected = True
+    
+    async def receive_audio():
+        nonlocal stream_ended, client_connected
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    client_connected = False
+                    break
+                if message.get("bytes"):
+                    stream.append(decoder.decode(message["bytes"]))
+                    audio_ready.set()
+                elif message.get("text"):
+                    try:
+                        control = json.loads(message["text"])
+                    except ValueError:
+                        continue
+                    if isinstance(control, dict) and control.get("type") == "stop":
+                        break
+        finally:
+            stream_ended = True
+            audio_ready.set()
+    
+    async def emit(segments: List[TranscriptSegment]):
+        for segment in segments:
+            message = segment.to_message()
+            if segment.kind == "final":
+                message["transcription_id"] = await _store_stream_segment(
+                    conversation_pk, participant_identity, participant_name, start_time, segment
+                )
+            if client_connected:
+                await websocket.send_json(message)
+    
+    receiver = asyncio.create_task(receive_audio())
+    try:
+        # Inference runs here while frames keep arriving in the receiver;
+        # audio that piles up meanwhile is covered by the next step
+        while not stream_ended:
+            await audio_ready.wait()
+            audio_ready.clear()
+            await emit(await stream.step())
         
-        db.add(conversation_summary)
+        # Finals for the tail of the stream are stored even if the client left
+        await emit(await stream.flush())
+        if client_connected:
+            await websocket.close()
+    except WebSocketDisconnect:
+        client_connected = False
+        await emit(await stream.flush())
+    except Exception as e:
+        logger.error(f"Streaming transcription error: {e}")
+        if client_connected:
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+    finally:
+        receiver.cancel()
+        logger.info(
+            f"Streaming transcription ended for {participant_name}: "
+            f"{stream.partials_emitted} partials, {stream.finals_emitted} finals"
+        )
+
+# Columns needed to show or summarize a transcript (never the audio)
+TRANSCRIPT_COLUMNS = (
+    Transcription.id,
+    Transcription.participant_name,
+    Transcription.participant_identity,
+    Transcription.transcribed_text,
+    Transcription.confidence_score,
+    Transcription.start_time,
+    Transcription.end_time,
+    Transcription.audio_duration,
+    Transcription.timestamp,
+    Transcription.processing_time
+)
+
+async def _load_transcript_rows(db: AsyncSession, conversation_pk: int):
+    """A conversation's transcript rows in speaking order, as lightweight column tuples"""
+    result = await db.execute(_transcript_page_query(conversation_pk))
+    return result.all()
+
+@router.post("/conversation/{conversation_id}/end")
+async def end_conversation_and_summarize(
+    conversation_id: str,
+    current_user: TokenData = Depends(require_user_or_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """End conversation and queue its summary
+    
+    Returns 202 at once; the summary is generated by background workers.
+    Follow progress at /conversation/{id}/summary/status (long-poll with
+    ?wait=) or /conversation/{id}/summary/events (server-sent events).
+    Ending a conversation whose summarization failed retries it.
+    """
+    try:
+        # Find active conversation (or one whose summary failed, to retry it)
+        result = await db.execute(
+            select(Conversation)
+            .where(
+                Conversation.conversation_id == conversation_id,
+                Conversation.status.in_([ConversationStatus.ACTIVE, ConversationStatus.FAILED])
+            )
+        )
+        conversation = result.scalar_one_or_none()
         
-        # Mark conversation as completed
-        conversation.status = ConversationStatus.COMPLETED
+        if not conversation:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Active conversation not found"
+            )
+        
+        # Release the participants' stream decoders, storing the end of each recording first
+        await stream_decoders.close_matching(lambda key: key[0] == conversation_id)
+        
+        # PROCESSING is the durable job record: unfinished summaries are resumed after a restart
+        conversation.status = ConversationStatus.PROCESSING
+        conversation.summary_started_at = None
+        if conversation.ended_at is None:
+            conversation.ended_at = datetime.utcnow()
         await db.commit()
-        await db.refresh(conversation_summary)
         
-        logger.info(f"Conversation {conversation_id} summarized successfully")
+        summary_jobs.enqueue(conversation.id)
         
-        return {
-            "conversation_id": conversation_id,
-            "status": "completed",
-            "summary": {
-                "id": conversation_summary.id,
-                "summary_text": summary_data["summary"],
-                "key_points": summary_data["key_points"],
-                "action_items": summary_data["action_items"],
-                "statistics": summary_data["statistics"],
-                "participants": summary_data["participants_analysis"]
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                "conversation_id": conversation_id,
+                "status": ConversationStatus.PROCESSING.value,
+                "message": "Conversation ended, summary is being generated"
             },
-            "duration": duration,
-            "transcriptions_count": len(transcription_data)
-        }
+            headers={"Location": f"/conversation/{conversation_id}/summary/status"}
+        )
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"End conversation error: {e}")
         await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to end conversation"
+        )
+
+async def _get_summary_state(conversation_id: str) -> Optional[dict]:
+    """Conversation status and latest summary id, read on a fresh short session"""
+    async with AsyncSessionLocal() as db:
+        latest_summary = (
+            select(func.max(ConversationSummary.id))
+            .where(ConversationSummary.conversation_id == Conversation.id)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            select(Conversation.id, Conversation.status, latest_summary.label("summary_id"))
+            .where(Conversation.conversation_id == conversation_id)
+        )
+        row = result.one_or_none()
+    if row is None:
+        return None
+    return {
+        "conversation_pk": row.id,
+        "conversation_id": conversation_id,
+        "status": row.status.value,
+        "summary_id": row.summary_id,
+        "summary_ready": row.summary_id is not None and row.status == ConversationStatus.COMPLETED
+    }
+
+# Statuses after which a conversation's summary will not change any more
+_SUMMARY_SETTLED = (ConversationStatus.COMPLETED.value, ConversationStatus.FAILED.value)
+
+@router.get("/conversation/{conversation_id}/summary/status")
+async def get_conversation_summary_status(
+    conversation_id: str,
+    wait: float = 0,  # Long-poll: seconds to wait for the summary to settle (max 60)
+    current_user: TokenData = Depends(require_user_or_admin)
+):
+    """Get summarization progress; summary_ready turns true once GET /summary has it"""
+    deadline = time.monotonic() + max(0.0, min(wait, 60.0))
+    try:
+        while True:
+            state = await _get_summary_state(conversation_id)
+            if state is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Conversation not found"
+                )
+            
+            remaining = deadline - time.monotonic()
+            if state["status"] != ConversationStatus.PROCESSING.value or remaining <= 0:
+                break
+            
+            # Woken as soon as the summary finishes in this process; re-checked every second otherwise
+            await summary_jobs.wait(state["conversation_pk"], min(remaining, 1.0))
         
-        # Try to mark conversation as completed even if summarization failed
-        try:
-            await db.execute(
-                update(Conversation)
-                .where(Conversation.conversation_id == conversation_id)
-                .values(status=ConversationStatus.COMPLETED, ended_at=datetime.utcnow())
-            )
-            await db.commit()
-        except:
-            pass
+        state.pop("conversation_pk")
+        return state
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get summary status error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to process conversation summary"
+            detail="Failed to retrieve summary status"
+        )
+
+@router.get("/conversation/{conversation_id}/summary/events")
+async def stream_conversation_summary_status(
+    conversation_id: str,
+    current_user: TokenData = Depends(require_user_or_admin)
+):
+    """Server-sent events: a 'status' event on every change, ending once the summary settles"""
+    state = await _get_summary_state(conversation_id)
+    if state is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found"
         )
+    
+    async def events():
+        current = state
+        last_sent = None
+        last_write = time.monotonic()
+        while True:
+            public = {key: value for key, value in current.items() if key != "conversation_pk"}
+            if public != last_sent:
+                yield f"event: status\ndata: {json.dumps(public)}\n\n"
+                last_sent = public
+                last_write = time.monotonic()
+                if public["status"] in _SUMMARY_SETTLED:
+                    return
+            elif time.monotonic() - last_write >= 15:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                last_write = time.monotonic()
+            
+            await summary_jobs.wait(current["conversation_pk"], 1.0)
+            current = await _get_summary_state(conversation_id)
+            if current is None:
+                return
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/conversation/{conversation_id}/summary")
 async def get_conversation_summary(
@@ -363,7 +1140,9 @@ async def get_conversation_summary(
                 "total_words": summary.total_words,
                 "total_duration": summary.total_duration,
                 "created_at": summary.created_at.isoformat(),
-                "model_used": summary.model_used
+                "model_used": summary.model_used,
+                "processing_time": summary.processing_time,
+                "processing_timings": json.loads(summary.processing_timings) if summary.processing_timings else {}
             },
             "started_at": conversation.started_at.isoformat(),
             "ended_at": conversation.ended_at.isoformat() if conversation.ended_at else None
@@ -378,19 +1157,103 @@ async def get_conversation_summary(
             detail="Failed to retrieve conversation summary"
         )
 
+# Page size limits for GET /conversation/{id}/transcriptions?limit=
+TRANSCRIPT_PAGE_MAX = int(os.getenv("TRANSCRIPT_PAGE_MAX", "500"))
+# Rows fetched per round trip when streaming NDJSON from a server-side cursor
+TRANSCRIPT_STREAM_BATCH = int(os.getenv("TRANSCRIPT_STREAM_BATCH", "200"))
+
+def _encode_transcript_cursor(start_time: int, transcription_id: int) -> str:
+    """Opaque keyset cursor pointing just after (start_time, id)"""
+    return base64.urlsafe_b64encode(f"{start_time}:{transcription_id}".encode()).decode().rstrip("=")
+
+def _decode_transcript_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        start_time, _, transcription_id = base64.urlsafe_b64decode(padded.encode()).decode().partition(":")
+        return int(start_time), int(transcription_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def _transcript_page_query(conversation_pk: int, after: Optional[Tuple[int, int]] = None, limit: Optional[int] = None):
+    """Transcript rows in (start_time, id) order, optionally after a keyset cursor
+    
+    A missing start_time sorts as 0: NULLs would otherwise fail the row
+    comparison and drop out of every page after the first.
+    """
+    start_time = func.coalesce(Transcription.start_time, 0)
+    query = (
+        select(*TRANSCRIPT_COLUMNS)
+        .where(Transcription.conversation_id == conversation_pk)
+        .order_by(start_time, Transcription.id)
+    )
+    if after is not None:
+        # Row comparison walks ix_transcriptions_conversation_order instead of using OFFSET
+        query = query.where(tuple_(start_time, Transcription.id) > tuple_(*after))
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def _transcript_to_dict(trans) -> dict:
+    return {
+        "id": trans.id,
+        "participant_name": trans.participant_name,
+        "participant_identity": trans.participant_identity,
+        "text": trans.transcribed_text,
+        "confidence": float(trans.confidence_score) if trans.confidence_score else None,
+        "start_time": trans.start_time,
+        "end_time": trans.end_time,
+        "duration": trans.audio_duration,
+        "timestamp": trans.timestamp.isoformat(),
+        "processing_time": trans.processing_time
+    }
+
+async def _stream_transcripts_ndjson(conversation_pk: int, after: Optional[Tuple[int, int]], limit: Optional[int]):
+    """Yield one JSON line per transcription as rows arrive from a server-side cursor"""
+    # Own session: the request's session is closed before the body is sent
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            _transcript_page_query(conversation_pk, after, limit)
+            .execution_options(yield_per=TRANSCRIPT_STREAM_BATCH)
+        )
+        async for rows in result.partitions():
+            yield "".join(json.dumps(_transcript_to_dict(trans)) + "\n" for trans in rows)
+
 @router.get("/conversation/{conversation_id}/transcriptions")
 async def get_conversation_transcriptions(
     conversation_id: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    format: str = "json",
     current_user: TokenData = Depends(require_user_or_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all transcriptions for a conversation"""
+    """
+    Get the transcriptions for a conversation
+
+    Without limit/cursor the whole transcript is returned as before. With
+    limit, one page is returned along with next_cursor; pass it back as
+    cursor for the following page. format=ndjson streams one transcription
+    per line instead (honouring cursor and limit when given).
+    """
+    if format not in ("json", "ndjson"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="format must be 'json' or 'ndjson'"
+        )
+    if limit is not None and not 1 <= limit <= TRANSCRIPT_PAGE_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit must be between 1 and {TRANSCRIPT_PAGE_MAX}"
+        )
+    after = _decode_transcript_cursor(cursor) if cursor else None
+    
     try:
-        # Find conversation with transcriptions
+        # Find conversation
         result = await db.execute(
-            select(Conversation)
-            .options(selectinload(Conversation.transcriptions))
-            .where(Conversation.conversation_id == conversation_id)
+            select(Conversation).where(Conversation.conversation_id == conversation_id)
         )
         conversation = result.scalar_one_or_none()
         
@@ -400,32 +1263,79 @@ async def get_conversation_transcriptions(
                 detail="Conversation not found"
             )
         
-        # Sort transcriptions by timestamp
-        transcriptions = sorted(
-            conversation.transcriptions, 
-            key=lambda x: x.start_time or 0
-        )
-        
-        transcription_list = []
-        for trans in transcriptions:
-            transcription_list.append({
-                "id": trans.id,
-                "participant_name": trans.participant_name,
-                "participant_identity": trans.participant_identity,
-                "text": trans.transcribed_text,
-                "confidence": float(trans.confidence_score) if trans.confidence_score else None,
-                "start_time": trans.start_time,
-                "end_time": trans.end_time,
-                "duration": trans.audio_duration,
-                "timestamp": trans.timestamp.isoformat(),
-                "processing_time": trans.processing_time
-            })
+        if format == "ndjson":
+            return StreamingResponse(
+                _stream_transcripts_ndjson(conversation.id, after, limit),
+                media_type="application/x-ndjson"
+            )
+        
+        paged = limit is not None or after is not None
+        if paged:
+            # One extra row tells whether another page follows
+            page_size = limit or TRANSCRIPT_PAGE_MAX
+            result = await db.execute(_transcript_page_query(conversation.id, after, page_size + 1))
+            transcriptions = result.all()
+            has_more = len(transcriptions) > page_size
+            transcriptions = transcriptions[:page_size]
+        else:
+            # Text-only projection, already ordered by start_time
+            transcriptions = await _load_transcript_rows(db, conversation.id)
+        
+        # Chunks still being transcribed in the background
+        result = await db.execute(
+            select(
+                TranscriptionJob.job_id,
+                TranscriptionJob.participant_name,
+                TranscriptionJob.participant_identity,
+                TranscriptionJob.start_time,
+                TranscriptionJob.status,
+                TranscriptionJob.created_at
+            )
+            .where(
+                TranscriptionJob.conversation_id == conversation.id,
+                TranscriptionJob.status.in_([JobStatus.PENDING, JobStatus.RUNNING])
+            )
+            .order_by(TranscriptionJob.start_time)
+        )
+        pending_list = [
+            {
+                "job_id": job.job_id,
+                "participant_name": job.participant_name,
+                "participant_identity": job.participant_identity,
+                "start_time": job.start_time,
+                "status": job.status.value,
+                "submitted_at": job.created_at.isoformat() if job.created_at else None
+            }
+            for job in result
+        ]
+        
+        transcription_list = [_transcript_to_dict(trans) for trans in transcriptions]
+        
+        if paged:
+            last = transcriptions[-1] if transcriptions else None
+            result = await db.execute(
+                select(Transcription.participant_name)
+                .where(Transcription.conversation_id == conversation.id)
+                .distinct()
+            )
+            return {
+                "conversation_id": conversation_id,
+                "status": conversation.status.value,
+                "transcriptions": transcription_list,
+                "next_cursor": _encode_transcript_cursor(last.start_time or 0, last.id) if has_more else None,
+                "has_more": has_more,
+                "pending": pending_list,
+                "total_pending": len(pending_list),
+                "participants": list(result.scalars().all())
+            }
         
         return {
             "conversation_id": conversation_id,
             "status": conversation.status.value,
             "transcriptions": transcription_list,
             "total_transcriptions": len(transcription_list),
+            "pending": pending_list,
+            "total_pending": len(pending_list),
             "participants": list(set(t["participant_name"] for t in transcription_list))
         }
         
@@ -438,6 +1348,95 @@ async def get_conversation_transcriptions(
             detail="Failed to retrieve transcriptions"
         )
 
+def _parse_byte_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single 'bytes=' range into [start, end); None means the whole body"""
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    first, _, last = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) + 1 if last else size
+        else:
+            # Suffix range: the last N bytes
+            start = max(0, size - int(last))
+            end = size
+    except ValueError:
+        return None
+    if start >= size or start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, min(end, size)
+
+@router.get("/transcriptions/{transcription_id}/audio")
+async def get_transcription_audio(
+    transcription_id: int,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    current_user: TokenData = Depends(require_user_or_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream a transcription's stored audio, honoring single byte-range requests"""
+    result = await db.execute(
+        select(Transcription.audio_ref, Transcription.audio_chunk, Transcription.audio_content_type)
+        .where(Transcription.id == transcription_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Transcription not found"
+        )
+    
+    if row.audio_ref is not None:
+        blob_store = get_blob_store()
+        try:
+            size = await blob_store.size_async(row.audio_ref)
+        except FileNotFoundError:
+            size = None
+        if size is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Audio blob missing from the blob store"
+            )
+        head = b"".join(await asyncio.to_thread(lambda: list(blob_store.iter_range(row.audio_ref, 0, 12))))
+        read_range = lambda start, end: blob_store.iter_range(row.audio_ref, start, end)
+    elif row.audio_chunk is not None:
+        # Rows not yet moved by scripts/migrate_audio_blobs.py still carry their audio inline
+        audio_data = row.audio_chunk
+        size = len(audio_data)
+        head = audio_data[:12]
+        read_range = lambda start, end: iter([audio_data[start:end]])
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No audio stored for this transcription"
+        )
+    
+    if is_wav(head):
+        media_type = "audio/wav"
+    elif is_webm(head):
+        media_type = "audio/webm"
+    else:
+        # e.g. raw PCM, whose sample format is only known from the upload's content type
+        media_type = row.audio_content_type or "application/octet-stream"
+    
+    headers = {"Accept-Ranges": "bytes"}
+    if size == 0:
+        return Response(content=b"", media_type=media_type, headers=headers)
+    byte_range = _parse_byte_range(range_header, size)
+    if byte_range is None:
+        start, end, status_code = 0, size, status.HTTP_200_OK
+    else:
+        (start, end), status_code = byte_range, status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    headers["Content-Length"] = str(end - start)
+    
+    # The blob iterator is synchronous (mmap / S3 body); Starlette drives it in a thread
+    return StreamingResponse(read_range(start, end), status_code=status_code, media_type=media_type, headers=headers)
+
 @router.get("/room/{room_id}/conversations")
 async def get_room_conversations(
     room_id: str,
@@ -504,4 +1503,17 @@ async def get_room_conversations(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve room conversations"
-        )
\ No newline at end of file
+        )
+@router.get("/stt/stats")
+async def get_stt_stats(
+    current_user: TokenData = Depends(require_user_or_admin)
+):
+    """Get speech-to-text batching and queue statistics"""
+    stats = stt_service.get_stats()
+    stats["admission"] = stt_admission.get_stats()
+    stats["jobs"] = transcription_jobs.get_stats()
+    stats["summary_jobs"] = summary_jobs.get_stats()
+    stats["rolling_summaries"] = rolling_summaries.get_stats()
+    stats["llm_cache"] = get_llm_cache().get_stats()
+    stats["stream_decoders"] = stream_decoders.get_stats()
+    return stats
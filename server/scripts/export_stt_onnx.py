@@ -0,0 +1,167 @@
+"""
+Export the Indonesian Wav2Vec2 model to ONNX and verify alternative STT backends
+Usage:
+    python scripts/export_stt_onnx.py export [--output onnx/wav2vec2-indonesian.onnx] [--quantize]
+    python scripts/export_stt_onnx.py verify --audio-dir samples/ [--backend onnx] [--tolerance 0.05]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".ogg", ".webm", ".m4a")
+
+
+def export_onnx(output_path: str, quantize: bool):
+    """Export the fp32 PyTorch model to an ONNX graph with dynamic batch/length axes"""
+    import torch
+    from services.speech_to_text import IndonesianSTTService
+
+    service = IndonesianSTTService(backend="torch")
+    service._load_model()
+    model = service.model.cpu()
+    # Export plain tuple outputs instead of a ModelOutput
+    model.config.return_dict = False
+
+    use_attention_mask = service.processor.feature_extractor.return_attention_mask
+    dummy_input = torch.zeros(1, service.sample_rate, dtype=torch.float32)
+    dummy_mask = torch.ones(1, service.sample_rate, dtype=torch.int64)
+
+    input_names = ["input_values"]
+    dynamic_axes = {"input_values": {0: "batch", 1: "samples"}, "logits": {0: "batch", 1: "frames"}}
+    args = (dummy_input,)
+    if use_attention_mask:
+        input_names.append("attention_mask")
+        dynamic_axes["attention_mask"] = {0: "batch", 1: "samples"}
+        args = (dummy_input, dummy_mask)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    print(f"📦 Exporting {service.model_name} to {output_path}...")
+    torch.onnx.export(
+        model,
+        args,
+        output_path,
+        input_names=input_names,
+        output_names=["logits"],
+        dynamic_axes=dynamic_axes,
+        opset_version=14,
+        do_constant_folding=True
+    )
+    print("✅ Export completed")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = output_path.replace(".onnx", ".int8.onnx")
+        print(f"📦 Quantizing to {quantized_path}...")
+        quantize_dynamic(output_path, quantized_path, weight_type=QuantType.QInt8)
+        print("✅ Quantization completed")
+
+
+def character_error_rate(reference: str, hypothesis: str) -> float:
+    """Levenshtein distance between the two strings divided by the reference length"""
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_char in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_char in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_char != hyp_char)
+            ))
+        previous = current
+    return previous[-1] / len(reference)
+
+
+def _transcribe_files(service, files):
+    """Transcribe each file, returning texts and total inference seconds"""
+    texts = []
+    total_seconds = 0.0
+    for path in files:
+        with open(path, "rb") as f:
+            audio_array = service._prepare_audio(f.read())
+        if audio_array is None:
+            texts.append("")
+            continue
+        started = time.perf_counter()
+        texts.append(service._run_batch_inference_sync([audio_array])[0])
+        total_seconds += time.perf_counter() - started
+    return texts, total_seconds
+
+
+def verify_backend(audio_dir: str, backend: str, tolerance: float) -> bool:
+    """Compare a backend's transcripts with the fp32 PyTorch baseline"""
+    import librosa
+    from services.speech_to_text import IndonesianSTTService
+
+    files = sorted(
+        os.path.join(audio_dir, name)
+        for name in os.listdir(audio_dir)
+        if name.lower().endswith(AUDIO_EXTENSIONS)
+    )
+    if not files:
+        print(f"❌ No audio files found in {audio_dir}")
+        return False
+
+    audio_seconds = sum(librosa.get_duration(path=path) for path in files)
+    print(f"🔍 Verifying backend '{backend}' on {len(files)} files ({audio_seconds:.1f}s of audio)")
+
+    baseline = IndonesianSTTService(backend="torch")
+    baseline._load_model()
+    baseline_texts, baseline_time = _transcribe_files(baseline, files)
+    del baseline
+
+    candidate = IndonesianSTTService(backend=backend)
+    candidate._load_model()
+    candidate_texts, candidate_time = _transcribe_files(candidate, files)
+
+    passed = True
+    for path, expected, actual in zip(files, baseline_texts, candidate_texts):
+        cer = character_error_rate(expected, actual)
+        ok = cer <= tolerance
+        passed = passed and ok
+        print(f"   {'✅' if ok else '❌'} {os.path.basename(path)}: CER={cer:.3f}")
+        if not ok:
+            print(f"       fp32:    {expected}")
+            print(f"       {backend}: {actual}")
+
+    print(f"\n⏱️  Real-time factor: fp32={baseline_time / audio_seconds:.3f}, "
+          f"{backend}={candidate_time / audio_seconds:.3f} "
+          f"(speed-up x{baseline_time / max(candidate_time, 1e-9):.2f})")
+    print(f"{'✅ Transcripts match' if passed else '❌ Transcripts differ'} within CER tolerance {tolerance}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and verify STT inference backends")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export the model to ONNX")
+    export_parser.add_argument("--output", default=os.getenv("STT_ONNX_PATH", "onnx/wav2vec2-indonesian.onnx"))
+    export_parser.add_argument("--quantize", action="store_true", help="Also write an int8 ONNX graph")
+
+    verify_parser = subparsers.add_parser("verify", help="Compare a backend with the fp32 baseline")
+    verify_parser.add_argument("--audio-dir", required=True)
+    verify_parser.add_argument("--backend", default="onnx", choices=["torch-int8", "onnx"])
+    verify_parser.add_argument("--tolerance", type=float, default=0.05, help="Max character error rate per file")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_onnx(args.output, args.quantize)
+    else:
+        sys.exit(0 if verify_backend(args.audio_dir, args.backend, args.tolerance) else 1)
+
+
+if __name__ == "__main__":
+    main()
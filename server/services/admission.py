@@ -0,0 +1,170 @@
+# services/admission.py - Bounded, per-user fair admission for STT requests
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """The work queue (or the caller's share of it) is full"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class AdmissionTicket:
+    user: str
+    enqueued_at: float
+    future: Optional[asyncio.Future] = None
+    started_at: Optional[float] = None
+
+
+class AdmissionController:
+    """
+    Admit at most max_active requests at a time and queue at most max_queue more
+
+    Queued requests are started round-robin across users, so one client with
+    many uploads waiting cannot starve others, and no user may hold more than
+    max_per_user queue entries. Anything beyond that is rejected immediately
+    with a Retry-After estimate instead of slowing everyone down.
+    """
+
+    def __init__(
+        self,
+        max_active: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        max_per_user: Optional[int] = None,
+        window: int = 500
+    ):
+        self.max_active = max_active or int(os.getenv("STT_ADMISSION_ACTIVE", os.getenv("STT_MAX_CONCURRENCY", "8")))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("STT_QUEUE_DEPTH", "32"))
+        self.max_per_user = max_per_user or int(os.getenv("STT_QUEUE_PER_USER", "8"))
+
+        self._active = 0
+        self._queues: Dict[str, Deque[AdmissionTicket]] = {}
+        self._turns: Deque[str] = deque()  # Users with queued work, in dispatch order
+        self._queued = 0
+
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {"queue_full": 0, "user_limit": 0}
+        self._wait_ms: Deque[float] = deque(maxlen=window)
+        self._service_ms: Deque[float] = deque(maxlen=window)
+
+    async def acquire(self, user: str) -> AdmissionTicket:
+        """Wait for a slot; raises AdmissionRejected when the queue cannot take the request"""
+        ticket = AdmissionTicket(user=user, enqueued_at=time.monotonic())
+
+        if self._active < self.max_active and self._queued == 0:
+            self._start(ticket)
+            return ticket
+
+        if self._queued >= self.max_queue:
+            self._reject("queue_full")
+        queue = self._queues.get(user)
+        if queue is not None and len(queue) >= self.max_per_user:
+            self._reject("user_limit")
+
+        ticket.future = asyncio.get_running_loop().create_future()
+        if queue is None:
+            queue = self._queues[user] = deque()
+            self._turns.append(user)
+        queue.append(ticket)
+        self._queued += 1
+
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.started_at is not None:
+                # Granted just as the client went away
+                self.release(ticket)
+            else:
+                self._dequeue(ticket)
+            raise
+        return ticket
+
+    def check_capacity(self):
+        """Raise AdmissionRejected if a new request would be turned away by a full queue
+
+        Lets callers refuse work before reading its (possibly large) payload;
+        the per-user limit still applies in acquire().
+        """
+        if self._queued >= self.max_queue:
+            self._reject("queue_full")
+
+    def release(self, ticket: AdmissionTicket):
+        """Return the slot and start the next queued request"""
+        self._active -= 1
+        self._service_ms.append((time.monotonic() - ticket.started_at) * 1000)
+        self._dispatch()
+
+    def _start(self, ticket: AdmissionTicket):
+        ticket.started_at = time.monotonic()
+        self._active += 1
+        self.admitted += 1
+        self._wait_ms.append((ticket.started_at - ticket.enqueued_at) * 1000)
+
+    def _dispatch(self):
+        while self._active < self.max_active and self._turns:
+            user = self._turns.popleft()
+            queue = self._queues[user]
+            ticket = queue.popleft()
+            self._queued -= 1
+            if queue:
+                self._turns.append(user)
+            else:
+                del self._queues[user]
+
+            self._start(ticket)
+            ticket.future.set_result(None)
+
+    def _dequeue(self, ticket: AdmissionTicket):
+        queue = self._queues.get(ticket.user)
+        if queue is None or ticket not in queue:
+            return
+        queue.remove(ticket)
+        self._queued -= 1
+        if not queue:
+            del self._queues[ticket.user]
+            self._turns.remove(ticket.user)
+
+    def _reject(self, reason: str):
+        self.rejected[reason] += 1
+        raise AdmissionRejected(reason, self.retry_after())
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog is expected to drain"""
+        service_s = (sum(self._service_ms) / len(self._service_ms) / 1000) if self._service_ms else 1.0
+        return min(60, max(1, math.ceil((self._queued + 1) * service_s / self.max_active)))
+
+    @staticmethod
+    def _percentile(values, q: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "max_active": self.max_active,
+            "queue_depth": self._queued,
+            "max_queue": self.max_queue,
+            "max_per_user": self.max_per_user,
+            "queued_users": len(self._queues),
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "wait_ms_avg": round(sum(self._wait_ms) / len(self._wait_ms), 2) if self._wait_ms else 0.0,
+            "wait_ms_p95": self._percentile(self._wait_ms, 0.95),
+            "service_ms_avg": round(sum(self._service_ms) / len(self._service_ms), 2) if self._service_ms else 0.0,
+            "retry_after_s": self.retry_after()
+        }
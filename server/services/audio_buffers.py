@@ -0,0 +1,64 @@
+# services/audio_buffers.py - Reusable NumPy buffers for batch assembly
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+
+class BufferPool:
+    """
+    Pool of flat NumPy buffers handed out as shaped views
+
+    Batches of similar size reuse the same memory instead of allocating a new
+    padded array for every forward pass. Safe to share between threads.
+    """
+
+    def __init__(self, dtype, max_free_buffers: int = 4):
+        self.dtype = np.dtype(dtype)
+        self.max_free_buffers = max_free_buffers
+        self._free: List[np.ndarray] = []
+        self._lock = threading.Lock()
+
+        self.allocations = 0
+        self.reuses = 0
+
+    @contextmanager
+    def borrow(self, shape: Tuple[int, ...]) -> Iterator[np.ndarray]:
+        """Yield an uninitialized array of `shape` backed by a pooled buffer"""
+        size = int(np.prod(shape))
+        buffer = self._acquire(size)
+        try:
+            yield buffer[:size].reshape(shape)
+        finally:
+            self._release(buffer)
+
+    def _acquire(self, size: int) -> np.ndarray:
+        with self._lock:
+            # Smallest free buffer that is large enough
+            candidates = [i for i, buf in enumerate(self._free) if buf.size >= size]
+            if candidates:
+                index = min(candidates, key=lambda i: self._free[i].size)
+                self.reuses += 1
+                return self._free.pop(index)
+            self.allocations += 1
+
+        # Leave headroom so slightly longer batches still fit next time
+        return np.empty(int(size * 1.25) + 1, dtype=self.dtype)
+
+    def _release(self, buffer: np.ndarray):
+        with self._lock:
+            self._free.append(buffer)
+            if len(self._free) > self.max_free_buffers:
+                smallest = min(range(len(self._free)), key=lambda i: self._free[i].size)
+                self._free.pop(smallest)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "allocations": self.allocations,
+                "reuses": self.reuses,
+                "free_buffers": len(self._free),
+                "pooled_bytes": sum(buf.nbytes for buf in self._free)
+            }
@@ -0,0 +1,128 @@
+# services/audio_formats.py - Fast decoding paths for raw PCM and WAV uploads
+
+import io
+import logging
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Content types that carry headerless little-endian PCM samples
+PCM_MIME_TYPES = ("audio/pcm", "audio/x-raw")
+WAV_MIME_TYPES = ("audio/wav", "audio/x-wav", "audio/wave", "audio/vnd.wave")
+WEBM_MIME_TYPES = ("audio/webm", "video/webm")
+
+PCM_ENCODINGS = {
+    "s16le": np.dtype("<i2"),
+    "f32le": np.dtype("<f4"),
+}
+
+
+@dataclass
+class PCMFormat:
+    """Layout of a raw PCM upload"""
+    dtype: np.dtype
+    sample_rate: int = 16000
+    channels: int = 1
+
+
+def _split_content_type(content_type: str) -> Tuple[str, dict]:
+    """Split 'audio/pcm; rate=16000' into ('audio/pcm', {'rate': '16000'})"""
+    mime, *params = [part.strip() for part in content_type.split(";")]
+    parsed = {}
+    for param in params:
+        if "=" in param:
+            key, value = param.split("=", 1)
+            parsed[key.strip().lower()] = value.strip().strip('"').lower()
+    return mime.lower(), parsed
+
+
+def parse_pcm_format(content_type: Optional[str]) -> Optional[PCMFormat]:
+    """
+    Parse a raw PCM declaration such as 'audio/pcm; encoding=f32le; rate=16000; channels=1'
+
+    Returns None when the content type is not raw PCM.
+    """
+    if not content_type:
+        return None
+
+    mime, params = _split_content_type(content_type)
+    if mime not in PCM_MIME_TYPES:
+        return None
+
+    encoding = params.get("encoding", params.get("format", "s16le"))
+    if encoding not in PCM_ENCODINGS:
+        raise ValueError(f"Unsupported PCM encoding '{encoding}', expected one of {list(PCM_ENCODINGS)}")
+
+    return PCMFormat(
+        dtype=PCM_ENCODINGS[encoding],
+        sample_rate=int(params.get("rate", 16000)),
+        channels=int(params.get("channels", 1))
+    )
+
+
+def is_wav(audio_data: bytes, content_type: Optional[str] = None) -> bool:
+    """Detect WAV by declared content type or RIFF/WAVE header"""
+    if content_type and _split_content_type(content_type)[0] in WAV_MIME_TYPES:
+        return True
+    return audio_data[:4] == b"RIFF" and audio_data[8:12] == b"WAVE"
+
+
+def is_webm(audio_data: bytes, content_type: Optional[str] = None) -> bool:
+    """Detect WebM (e.g. MediaRecorder output) by content type or EBML header"""
+    if content_type and _split_content_type(content_type)[0] in WEBM_MIME_TYPES:
+        return True
+    return audio_data[:4] == b"\x1a\x45\xdf\xa3"
+
+
+def pcm_to_float32(audio_data: bytes, pcm_format: PCMFormat) -> Tuple[np.ndarray, int]:
+    """
+    Interpret raw PCM bytes as mono float32 samples
+
+    float32 mono input is returned as a read-only view of the upload buffer (no copy);
+    int16 is scaled in a single pass.
+    """
+    frame_size = pcm_format.dtype.itemsize * pcm_format.channels
+    usable = len(audio_data) - len(audio_data) % frame_size
+    samples = np.frombuffer(memoryview(audio_data)[:usable], dtype=pcm_format.dtype)
+
+    if pcm_format.dtype.kind == "i":
+        samples = np.multiply(samples, np.float32(1.0 / 32768.0), dtype=np.float32)
+    elif pcm_format.dtype != np.float32:
+        samples = samples.astype(np.float32)
+
+    if pcm_format.channels > 1:
+        samples = samples.reshape(-1, pcm_format.channels).mean(axis=1, dtype=np.float32)
+
+    return samples, pcm_format.sample_rate
+
+
+def read_wav(audio_data: bytes) -> Tuple[np.ndarray, int]:
+    """Read WAV samples as mono float32 using the header's own sample rate"""
+    import soundfile as sf
+
+    samples, sample_rate = sf.read(io.BytesIO(audio_data), dtype="float32", always_2d=False)
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1, dtype=np.float32)
+    return samples, sample_rate
+
+
+class PCMStreamDecoder:
+    """Incremental raw PCM decoding for a continuous stream split into arbitrary frames"""
+
+    def __init__(self, pcm_format: PCMFormat):
+        self.pcm_format = pcm_format
+        self.frame_size = pcm_format.dtype.itemsize * pcm_format.channels
+        self._remainder = b""
+
+    def decode(self, chunk: bytes) -> np.ndarray:
+        """Samples in this chunk; a partial trailing frame is kept for the next one"""
+        if self._remainder:
+            chunk = self._remainder + chunk
+        usable = len(chunk) - len(chunk) % self.frame_size
+        self._remainder = bytes(chunk[usable:])
+        samples, _ = pcm_to_float32(chunk[:usable], self.pcm_format)
+        # float32 input is a view of the frame; copy so it can be kept after the frame is gone
+        return samples.copy() if not samples.flags.writeable else samples
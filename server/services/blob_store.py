@@ -0,0 +1,173 @@
+# services/blob_store.py - Content-addressed storage for audio chunks
+
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def content_ref(data: bytes) -> str:
+    """Content address of a blob: hex SHA-256 of its bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    """
+    Immutable blobs addressed by their SHA-256
+
+    put() is idempotent: identical audio is stored once however often it is
+    uploaded. Implementations are synchronous; use the *_async helpers from
+    the event loop.
+    """
+
+    def put(self, data: bytes) -> str:
+        raise NotImplementedError
+
+    def get(self, ref: str) -> bytes:
+        raise NotImplementedError
+
+    def size(self, ref: str) -> int:
+        raise NotImplementedError
+
+    def iter_range(self, ref: str, start: int = 0, end: Optional[int] = None, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Yield bytes [start, end) of a blob in chunks (end exclusive, None for the whole tail)"""
+        raise NotImplementedError
+
+    def delete(self, ref: str):
+        raise NotImplementedError
+
+    async def put_async(self, data: bytes) -> str:
+        return await asyncio.to_thread(self.put, data)
+
+    async def get_async(self, ref: str) -> bytes:
+        return await asyncio.to_thread(self.get, ref)
+
+    async def size_async(self, ref: str) -> int:
+        return await asyncio.to_thread(self.size, ref)
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs on the local filesystem under root/ab/cd/<ref>, read back through mmap"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, ref: str) -> str:
+        if len(ref) < 4 or not all(c in "0123456789abcdef" for c in ref):
+            raise ValueError(f"Invalid blob reference '{ref}'")
+        return os.path.join(self.root, ref[:2], ref[2:4], ref)
+
+    def put(self, data: bytes) -> str:
+        ref = content_ref(data)
+        path = self._path(ref)
+        if os.path.exists(path):
+            return ref
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Write then rename so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return ref
+
+    def get(self, ref: str) -> bytes:
+        with open(self._path(ref), "rb") as f:
+            return f.read()
+
+    def size(self, ref: str) -> int:
+        return os.path.getsize(self._path(ref))
+
+    def iter_range(self, ref: str, start: int = 0, end: Optional[int] = None, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        with open(self._path(ref), "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            end = file_size if end is None else min(end, file_size)
+            if file_size == 0 or start >= end:
+                return
+            # Only the requested pages are faulted in, straight from the page cache
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for offset in range(start, end, chunk_size):
+                    yield mapped[offset:min(offset + chunk_size, end)]
+
+    def delete(self, ref: str):
+        try:
+            os.unlink(self._path(ref))
+        except FileNotFoundError:
+            pass
+
+
+class S3BlobStore(BlobStore):
+    """Blobs in an S3-compatible bucket (AWS S3, MinIO, ...), fetched with ranged GETs"""
+
+    def __init__(self, bucket: str, prefix: str = "audio/", endpoint_url: Optional[str] = None):
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("BLOB_STORE=s3 requires boto3 (pip install boto3)")
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def _key(self, ref: str) -> str:
+        return f"{self.prefix}{ref[:2]}/{ref[2:4]}/{ref}"
+
+    def _exists(self, ref: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(ref))
+            return True
+        except self.client.exceptions.ClientError:
+            return False
+
+    def put(self, data: bytes) -> str:
+        ref = content_ref(data)
+        if not self._exists(ref):
+            self.client.put_object(Bucket=self.bucket, Key=self._key(ref), Body=data)
+        return ref
+
+    def get(self, ref: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(ref))["Body"].read()
+
+    def size(self, ref: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=self._key(ref))["ContentLength"]
+
+    def iter_range(self, ref: str, start: int = 0, end: Optional[int] = None, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        byte_range = f"bytes={start}-" if end is None else f"bytes={start}-{end - 1}"
+        body = self.client.get_object(Bucket=self.bucket, Key=self._key(ref), Range=byte_range)["Body"]
+        yield from body.iter_chunks(chunk_size)
+
+    def delete(self, ref: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(ref))
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """Process-wide blob store configured by BLOB_STORE (local or s3)"""
+    global _blob_store
+    if _blob_store is None:
+        backend = os.getenv("BLOB_STORE", "local").lower()
+        if backend == "s3":
+            _blob_store = S3BlobStore(
+                bucket=os.environ["BLOB_STORE_BUCKET"],
+                prefix=os.getenv("BLOB_STORE_PREFIX", "audio/"),
+                endpoint_url=os.getenv("BLOB_STORE_ENDPOINT_URL") or None
+            )
+        elif backend == "local":
+            _blob_store = LocalBlobStore(os.getenv("BLOB_STORE_DIR", "blobs"))
+        else:
+            raise ValueError(f"Unknown BLOB_STORE '{backend}', expected 'local' or 's3'")
+        logger.info(f"Using {type(_blob_store).__name__} for audio")
+    return _blob_store
@@ -0,0 +1,211 @@
+# services/conversation_summaries.py - Background summarization of ended conversations
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.sql import func
+
+from database.models import Conversation, ConversationStatus, ConversationSummary, Transcription
+from services.job_queue import BackgroundJobQueue
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationSummaryRunner:
+    """
+    Summarize ended conversations in the background
+
+    The conversation's PROCESSING status is the job record: enqueue() only
+    needs its primary key. A worker claims the conversation by stamping
+    summary_started_at (an atomic update that only succeeds when no other
+    worker holds a live claim), and recover() re-queues conversations still
+    PROCESSING after a restart whose claim is missing or older than
+    SUMMARY_STALE_S, so several processes starting together do not all
+    summarize the same backlog. It also runs every SUMMARY_SWEEP_S, so the
+    claims of a worker that died while others keep running are retaken once
+    stale. The summary is written in the same commit that moves the
+    conversation to COMPLETED (guarded on PROCESSING), so a conversation is
+    still summarized once even if a stale claim is retaken.
+    """
+
+    def __init__(self, summarization_service, session_factory, concurrency: Optional[int] = None, stale_after_s: Optional[float] = None):
+        self.summarization_service = summarization_service
+        self.session_factory = session_factory
+        self.stale_after = timedelta(seconds=stale_after_s if stale_after_s is not None else float(
+            os.getenv("SUMMARY_STALE_S", "600")
+        ))
+        self.sweep_interval = float(os.getenv("SUMMARY_SWEEP_S", "60"))
+        self._sweeper: Optional[asyncio.Task] = None
+        self.queue = BackgroundJobQueue(
+            "summary",
+            self._run,
+            concurrency=concurrency or int(os.getenv("SUMMARY_WORKERS", "2"))
+        )
+
+    def start(self):
+        self.queue.start()
+        if self._sweeper is None:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_loop(), name="summary-sweep")
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+        await self.queue.stop()
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.recover()
+            except Exception as e:
+                logger.error(f"Summary job sweep failed: {e}")
+
+    def enqueue(self, conversation_pk: int) -> bool:
+        return self.queue.enqueue(conversation_pk)
+
+    async def recover(self) -> int:
+        """Re-queue conversations whose summarization is unclaimed or whose worker died mid-run"""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(Conversation.id)
+                .where(
+                    Conversation.status == ConversationStatus.PROCESSING,
+                    self._claimable()
+                )
+                .order_by(Conversation.ended_at)
+            )
+            conversation_ids = result.scalars().all()
+
+        # Conversations already queued in this process are not queued twice
+        queued = sum(self.queue.enqueue(conversation_pk) for conversation_pk in conversation_ids)
+        if queued:
+            logger.info(f"Recovered {queued} unfinished summaries")
+        return queued
+
+    async def wait(self, conversation_pk: int, timeout: float) -> bool:
+        """Wait for a summary being produced in this process"""
+        return await self.queue.wait(conversation_pk, timeout)
+
+    def _claimable(self):
+        """Conversations no live worker is summarizing"""
+        stale_before = datetime.now(timezone.utc) - self.stale_after
+        return or_(
+            Conversation.summary_started_at.is_(None),
+            Conversation.summary_started_at < stale_before
+        )
+
+    async def _run(self, conversation_pk: int):
+        # Claim the conversation; another process may already be summarizing it
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(Conversation)
+                .where(
+                    Conversation.id == conversation_pk,
+                    Conversation.status == ConversationStatus.PROCESSING,
+                    self._claimable()
+                )
+                .values(summary_started_at=func.now())
+                .returning(
+                    Conversation.conversation_id,
+                    Conversation.started_at,
+                    Conversation.ended_at,
+                    Conversation.rolling_summary
+                )
+            )
+            conversation = result.one_or_none()
+            await db.commit()
+            if conversation is None:
+                return
+
+            result = await db.execute(
+                select(
+                    Transcription.id,
+                    Transcription.participant_name,
+                    Transcription.participant_identity,
+                    Transcription.transcribed_text,
+                    Transcription.confidence_score,
+                    Transcription.timestamp,
+                    Transcription.start_time,
+                    Transcription.end_time,
+                    Transcription.rolling_folded
+                )
+                .where(Transcription.conversation_id == conversation_pk)
+                .order_by(func.coalesce(Transcription.start_time, 0), Transcription.id)
+            )
+            transcriptions = result.all()
+
+        if not transcriptions:
+            await self._finish(conversation_pk, ConversationStatus.COMPLETED)
+            logger.info(f"Conversation {conversation.conversation_id} has no transcriptions to summarize")
+            return
+
+        # Prepare transcription data for summarization
+        transcription_data = [
+            {
+                "id": trans.id,
+                "participant_name": trans.participant_name,
+                "participant_identity": trans.participant_identity,
+                "transcribed_text": trans.transcribed_text,
+                "confidence_score": trans.confidence_score,
+                "timestamp": trans.timestamp.isoformat(),
+                "start_time": trans.start_time or 0,
+                "end_time": trans.end_time or 0,
+                "rolling_folded": trans.rolling_folded
+            }
+            for trans in transcriptions
+        ]
+        duration = int((conversation.ended_at - conversation.started_at).total_seconds())
+
+        try:
+            summary_data = await self.summarization_service.summarize_conversation(
+                transcriptions=transcription_data,
+                conversation_duration=duration,
+                language="indonesian",
+                # With a running summary only the rows not folded into it are read again
+                rolling_summary=conversation.rolling_summary
+            )
+        except Exception:
+            await self._finish(conversation_pk, ConversationStatus.FAILED)
+            raise
+
+        conversation_summary = ConversationSummary(
+            conversation_id=conversation_pk,
+            summary_text=summary_data["summary"],
+            key_points=json.dumps(summary_data["key_points"], ensure_ascii=False),
+            action_items=json.dumps(summary_data["action_items"], ensure_ascii=False),
+            participants_summary=json.dumps(summary_data["participants_analysis"], ensure_ascii=False),
+            total_duration=duration,
+            total_words=summary_data["statistics"]["total_words"],
+            model_used=f"{self.summarization_service.model}",
+            processing_time=summary_data.get("processing_time"),
+            processing_timings=json.dumps(summary_data.get("timings") or {})
+        )
+        if await self._finish(conversation_pk, ConversationStatus.COMPLETED, conversation_summary):
+            logger.info(f"Conversation {conversation.conversation_id} summarized successfully")
+
+    async def _finish(self, conversation_pk: int, new_status: ConversationStatus, summary: Optional[ConversationSummary] = None) -> bool:
+        """Leave PROCESSING (storing the summary in the same commit); False if someone else already did"""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(Conversation)
+                .where(Conversation.id == conversation_pk, Conversation.status == ConversationStatus.PROCESSING)
+                .values(status=new_status)
+                .returning(Conversation.id)
+            )
+            if result.scalar_one_or_none() is None:
+                await db.rollback()
+                return False
+            if summary is not None:
+                db.add(summary)
+            await db.commit()
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.queue.get_stats()
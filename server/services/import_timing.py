@@ -0,0 +1,71 @@
+# services/import_timing.py - Deferred heavy imports and startup import-cost report
+#
+# Print the per-module import cost of the API process:
+#     python -m services.import_timing [--target main] [--top 25]
+
+import argparse
+import importlib
+import logging
+import subprocess
+import sys
+import time
+from types import ModuleType
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Wall time (ms) of the first import of each module loaded through timed_import
+_import_times: Dict[str, float] = {}
+
+
+def timed_import(module_name: str) -> ModuleType:
+    """Import a module on first use and record how long it took"""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    _import_times[module_name] = round(elapsed_ms, 1)
+    logger.info(f"Imported {module_name} in {elapsed_ms:.0f}ms")
+    return module
+
+
+def get_import_times() -> Dict[str, float]:
+    return dict(_import_times)
+
+
+def startup_report(target: str = "main", top: int = 25) -> List[Tuple[str, int, int]]:
+    """
+    Import `target` in a fresh interpreter with -X importtime
+
+    Returns:
+        List of (module, self_us, cumulative_us) sorted by cumulative cost
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True
+    )
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        entries.append((module.strip(), int(self_us), int(cumulative_us)))
+
+    entries.sort(key=lambda entry: entry[2], reverse=True)
+    return entries[:top]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report per-module import cost")
+    parser.add_argument("--target", default="main", help="Module to import (default: main)")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for module, self_us, cumulative_us in startup_report(args.target, args.top):
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {module}")
@@ -0,0 +1,103 @@
+# services/job_queue.py - Fixed pool of asyncio workers for background jobs
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundJobQueue:
+    """
+    Drain a queue of job keys with a fixed number of worker tasks
+
+    Jobs are identified by a key (e.g. a primary key); the handler loads and
+    persists whatever state it needs, so the queue itself only holds keys and
+    can be rebuilt from the database after a restart. A key already queued or
+    running is not enqueued twice.
+    """
+
+    def __init__(self, name: str, handler: Callable[[Hashable], Awaitable[None]], concurrency: int = 2):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._known: Set[Hashable] = set()
+        self._done_events: Dict[Hashable, asyncio.Event] = {}
+
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        """Start the worker tasks on the running event loop"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        self._workers = [
+            loop.create_task(self._worker(), name=f"{self.name}-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Started {self.concurrency} {self.name} workers")
+
+    def enqueue(self, key: Hashable) -> bool:
+        """Queue a job; returns False when it is already queued or running"""
+        if key in self._known:
+            return False
+        self._known.add(key)
+        self._queue.put_nowait(key)
+        return True
+
+    async def wait(self, key: Hashable, timeout: float) -> bool:
+        """
+        Wait until a job handled by this process finishes; False on timeout
+
+        A job this process does not know about (queued elsewhere, or already
+        finished) cannot signal completion, so the full timeout is slept to
+        keep polling callers from spinning.
+        """
+        if key not in self._known:
+            await asyncio.sleep(timeout)
+            return False
+        event = self._done_events.setdefault(key, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _worker(self):
+        while True:
+            key = await self._queue.get()
+            try:
+                await self.handler(key)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"{self.name} job {key} failed: {e}")
+            finally:
+                self._known.discard(key)
+                event = self._done_events.pop(key, None)
+                if event is not None:
+                    event.set()
+                self._queue.task_done()
+
+    async def stop(self):
+        """Cancel the workers; unfinished jobs stay in the database for the next start"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": len(self._known) - (self._queue.qsize() if self._queue is not None else 0),
+            "completed": self.completed,
+            "failed": self.failed
+        }
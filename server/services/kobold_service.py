@@ -8,12 +8,15 @@ from typing import Dict, Any, List, Tuple
 import time
 import os
 
+from services.llm_cache import LLMResponseCache, get_llm_cache
+
 logger = logging.getLogger(__name__)
 
 class KoboldCppService:
-    def __init__(self, base_url: str = None):
+    def __init__(self, base_url: str = None, cache: LLMResponseCache = None):
         self.base_url = base_url or os.getenv("KOBOLDCPP_URL", "http://localhost:5001")
         self.session = None
+        self.cache = cache or get_llm_cache()
         
     async def __aenter__(self):
         self.session = aiohttp.ClientSession()
@@ -66,10 +69,22 @@ class KoboldCppService:
             logger.error(f"KoboldCpp transcription error: {e}")
             raise
 
-    async def generate_text(self, prompt: str, max_tokens: int = 500, temperature: float = 0.3) -> str:
+    async def generate_text(self, prompt: str, max_tokens: int = 500, temperature: float = 0.3, prompt_version: str = "1") -> str:
         """
         Generate text using KoboldCpp completion API
+        
+        Identical requests are answered from the LLM response cache; pass a new
+        prompt_version when the caller's prompt template changes.
         """
+        params = {"max_tokens": max_tokens, "temperature": temperature}
+        key = self.cache.make_key("koboldcpp", self.base_url, prompt_version, params, prompt)
+        return await self.cache.get_or_compute(
+            key,
+            lambda: self._generate_text(prompt, max_tokens, temperature)
+        )
+
+    async def _generate_text(self, prompt: str, max_tokens: int, temperature: float) -> Tuple[str, int, int]:
+        """Uncached completion: (text, prompt tokens, completion tokens)"""
         try:
             if not self.session:
                 self.session = aiohttp.ClientSession()
@@ -99,7 +114,13 @@ class KoboldCppService:
                 # Extract generated text
                 if 'choices' in result and len(result['choices']) > 0:
                     generated_text = result['choices'][0].get('text', '').strip()
-                    return generated_text
+                    # Token counts are estimated when the server does not report usage
+                    usage = result.get('usage') or {}
+                    return (
+                        generated_text,
+                        usage.get('prompt_tokens', len(prompt) // 4),
+                        usage.get('completion_tokens', len(generated_text) // 4)
+                    )
                 else:
                     logger.error(f"Unexpected response format: {result}")
                     raise Exception("Invalid response format from KoboldCpp")
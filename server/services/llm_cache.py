@@ -0,0 +1,244 @@
+# services/llm_cache.py - Persistent cache of LLM responses
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (response text, prompt tokens, completion tokens)
+LLMResult = Tuple[str, int, int]
+
+
+class LLMResponseCache:
+    """
+    LLM responses in a SQLite file, keyed by a hash of everything that shapes the answer
+
+    Keys cover the provider, model, prompt template version, sampling
+    parameters and the full input, so changing any of them never serves a
+    stale answer. Entries expire after ttl_s and the least recently used are
+    evicted once the file holds more than max_bytes of responses. Only
+    successful responses that pass the caller's validator are stored (and a
+    cached response that no longer passes is ignored); concurrent identical
+    requests share one call. The database is opened in WAL mode so several API processes can
+    share the file.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_s: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+        self.path = path or os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+        self.ttl_s = ttl_s if ttl_s is not None else float(os.getenv("LLM_CACHE_TTL_S", str(7 * 24 * 3600)))
+        self.max_bytes = max_bytes or int(float(os.getenv("LLM_CACHE_MAX_MB", "100")) * 1024 * 1024)
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._pending: Dict[str, asyncio.Task] = {}
+
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_prompt_tokens = 0
+        self.saved_completion_tokens = 0
+
+    @staticmethod
+    def make_key(provider: str, model: str, prompt_version: str, params: Dict[str, Any], request: Any) -> str:
+        """Hash of the provider, model, prompt version, parameters and input (messages or prompt)"""
+        payload = json.dumps(
+            [provider, model, prompt_version, params, request],
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[LLMResult]],
+        validate: Optional[Callable[[str], Any]] = None
+    ) -> str:
+        """
+        Return the cached response for key, or call the model and store its answer
+
+        validate, when given, raises on a response the caller cannot use; such
+        a response is returned to no one and never stored.
+        """
+        if not self.enabled:
+            text, _, _ = await compute()
+            if validate is not None:
+                validate(text)
+            return text
+
+        cached = await asyncio.to_thread(self._read, key)
+        if cached is not None and not self._usable(cached[0], validate):
+            cached = None
+        if cached is not None:
+            text, prompt_tokens, completion_tokens = cached
+            self.hits += 1
+            self.saved_prompt_tokens += prompt_tokens
+            self.saved_completion_tokens += completion_tokens
+            return text
+
+        # Ending a conversation twice or retrying runs the same prompts concurrently
+        task = self._pending.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # Detached so that one requester going away does not cancel the others
+            task = asyncio.get_running_loop().create_task(self._compute_and_store(key, compute, validate))
+            self._pending[key] = task
+            task.add_done_callback(lambda done: self._finish_pending(key, done))
+        return await asyncio.shield(task)
+
+    async def _compute_and_store(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[LLMResult]],
+        validate: Optional[Callable[[str], Any]]
+    ) -> str:
+        self.misses += 1
+        result = await compute()
+        if validate is not None:
+            validate(result[0])
+        await asyncio.to_thread(self._write, key, result)
+        return result[0]
+
+    @staticmethod
+    def _usable(text: str, validate: Optional[Callable[[str], Any]]) -> bool:
+        if validate is None:
+            return True
+        try:
+            validate(text)
+            return True
+        except Exception:
+            return False
+
+    def _finish_pending(self, key: str, task: asyncio.Task):
+        if self._pending.get(key) is task:
+            del self._pending[key]
+        if not task.cancelled():
+            # Mark retrieved so a failure nobody waited for does not log a warning
+            task.exception()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " prompt_tokens INTEGER NOT NULL,"
+                " completion_tokens INTEGER NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_last_used ON responses (last_used)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _read(self, key: str) -> Optional[LLMResult]:
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT response, prompt_tokens, completion_tokens, created_at FROM responses WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if time.time() - row[3] > self.ttl_s:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                    return None
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+                return row[0], row[1], row[2]
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+
+    def _write(self, key: str, result: LLMResult):
+        text, prompt_tokens, completion_tokens = result
+        size = len(text.encode("utf-8"))
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, text, prompt_tokens, completion_tokens, size, now, now)
+                )
+                self._evict(conn, now)
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drop expired entries, then the least recently used until under max_bytes"""
+        expired = conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_s,)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        evicted = 0
+        if total > self.max_bytes:
+            # Trim to 90% so a full cache does not evict on every write
+            target = total - int(self.max_bytes * 0.9)
+            freed = 0
+            victims = []
+            for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+                if freed >= target:
+                    break
+                victims.append((key,))
+                freed += size
+            conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+            evicted = len(victims)
+        self.evictions += expired + evicted
+
+    def _entry_stats(self) -> Tuple[int, int]:
+        try:
+            with self._lock:
+                return tuple(self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone())
+        except sqlite3.Error:
+            return 0, 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.coalesced + self.misses
+        entries, size = self._entry_stats() if self.enabled else (0, 0)
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "entries": entries,
+            "size_mb": round(size / 1024 / 1024, 2),
+            "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((lookups - self.misses) / lookups, 3) if lookups else 0.0,
+            "saved_prompt_tokens": self.saved_prompt_tokens,
+            "saved_completion_tokens": self.saved_completion_tokens
+        }
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Process-wide LLM response cache configured by LLM_CACHE_*"""
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = LLMResponseCache()
+    return _llm_cache
@@ -0,0 +1,56 @@
+# services/process_memory.py - Per-process memory breakdown from /proc
+#
+# Compare gunicorn workers (unique vs shared pages) from outside the server:
+#     python -m services.process_memory <pid> [<pid> ...]
+
+import argparse
+import os
+from typing import Dict, List
+
+
+def get_process_memory(pid: str = "self") -> Dict[str, float]:
+    """
+    RSS, PSS, unique (USS) and shared memory of a process in MiB
+
+    USS is what the process would give back if it exited; with the model
+    preloaded before fork the weights show up as shared, not unique.
+    Returns an empty dict where /proc/<pid>/smaps_rollup is unavailable.
+    """
+    fields: Dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[0].endswith(":") and parts[2] == "kB":
+                    fields[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        return {}
+
+    def mib(*names: str) -> float:
+        return round(sum(fields.get(name, 0) for name in names) / 1024, 1)
+
+    return {
+        "pid": os.getpid() if pid == "self" else int(pid),
+        "rss_mb": mib("Rss"),
+        "pss_mb": mib("Pss"),
+        "uss_mb": mib("Private_Clean", "Private_Dirty"),
+        "shared_mb": mib("Shared_Clean", "Shared_Dirty")
+    }
+
+
+def format_process_memory(memory: Dict[str, float]) -> str:
+    if not memory:
+        return "memory stats unavailable"
+    return (f"pid {memory['pid']}: rss {memory['rss_mb']:.1f} MiB, pss {memory['pss_mb']:.1f} MiB, "
+            f"unique {memory['uss_mb']:.1f} MiB, shared {memory['shared_mb']:.1f} MiB")
+
+
+def _main(pids: List[str]):
+    for pid in pids:
+        print(format_process_memory(get_process_memory(pid)) if os.path.exists(f"/proc/{pid}") else f"pid {pid}: not running")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show unique vs shared memory of processes")
+    parser.add_argument("pids", nargs="*", default=["self"])
+    _main(parser.parse_args().pids)
@@ -0,0 +1,171 @@
+# services/rolling_summaries.py - Running summaries of conversations while they are active
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.sql import func
+
+from database.models import Conversation, ConversationStatus, Transcription
+from services.job_queue import BackgroundJobQueue
+
+logger = logging.getLogger(__name__)
+
+
+class RollingSummaryRunner:
+    """
+    Keep Conversation.rolling_summary up to date during the conversation
+
+    Every scan interval, active conversations with at least fold_rows new
+    transcriptions - or any new ones and fold_minutes since the last fold -
+    get the new rows folded into their running summary. Ending the
+    conversation then only has to merge that summary with the last few rows.
+    Progress is tracked per row (Transcription.rolling_folded, set in the same
+    commit as the summary), so a chunk committed late with a lower id is still
+    folded. Each fold only commits if rolling_summary_at has not moved and the
+    conversation is still active, so several API processes can scan the same
+    database and a fold never lands after the final summary has started.
+    """
+
+    def __init__(
+        self,
+        summarization_service,
+        session_factory,
+        fold_rows: Optional[int] = None,
+        fold_minutes: Optional[float] = None,
+        scan_interval_s: Optional[float] = None
+    ):
+        self.summarization_service = summarization_service
+        self.session_factory = session_factory
+        self.enabled = os.getenv("SUMMARY_ROLLING", "false").lower() == "true"
+        self.fold_rows = fold_rows or int(os.getenv("SUMMARY_ROLLING_ROWS", "40"))
+        self.fold_after = timedelta(minutes=fold_minutes or float(os.getenv("SUMMARY_ROLLING_MINUTES", "5")))
+        self.scan_interval = scan_interval_s or float(os.getenv("SUMMARY_ROLLING_INTERVAL_S", "30"))
+        # Rows read per fold; a backlog larger than this is caught up over several folds
+        self.max_rows = max(self.fold_rows, int(os.getenv("SUMMARY_ROLLING_MAX_ROWS", "500")))
+
+        self.queue = BackgroundJobQueue("rolling-summary", self._fold, concurrency=int(os.getenv("SUMMARY_ROLLING_WORKERS", "1")))
+        self._scanner: Optional[asyncio.Task] = None
+        self.folds = 0
+        self.folded_rows = 0
+
+    def start(self):
+        if not self.enabled or self._scanner is not None:
+            return
+        self.queue.start()
+        self._scanner = asyncio.get_running_loop().create_task(self._scan_loop(), name="rolling-summary-scan")
+        logger.info(f"Rolling summaries every {self.fold_rows} rows or {self.fold_after} (scan every {self.scan_interval:g}s)")
+
+    async def stop(self):
+        if self._scanner is not None:
+            self._scanner.cancel()
+            await asyncio.gather(self._scanner, return_exceptions=True)
+            self._scanner = None
+        await self.queue.stop()
+
+    async def _scan_loop(self):
+        while True:
+            await asyncio.sleep(self.scan_interval)
+            try:
+                await self.scan()
+            except Exception as e:
+                logger.error(f"Rolling summary scan failed: {e}")
+
+    async def scan(self) -> int:
+        """Queue a fold for every active conversation that has enough new transcriptions"""
+        stale_before = datetime.now(timezone.utc) - self.fold_after
+        new_rows = func.count(Transcription.id)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(Conversation.id)
+                .join(Transcription, and_(
+                    Transcription.conversation_id == Conversation.id,
+                    Transcription.rolling_folded.is_(False)
+                ))
+                .where(Conversation.status == ConversationStatus.ACTIVE)
+                .group_by(Conversation.id)
+                .having(or_(
+                    new_rows >= self.fold_rows,
+                    func.coalesce(Conversation.rolling_summary_at, Conversation.started_at) < stale_before
+                ))
+            )
+            conversation_ids = result.scalars().all()
+
+        return sum(self.queue.enqueue(conversation_pk) for conversation_pk in conversation_ids)
+
+    async def _fold(self, conversation_pk: int):
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(Conversation.status, Conversation.rolling_summary, Conversation.rolling_summary_at)
+                .where(Conversation.id == conversation_pk)
+            )
+            conversation = result.one_or_none()
+            if conversation is None or conversation.status != ConversationStatus.ACTIVE:
+                return
+
+            # Oldest unfolded rows first, so a backlog is caught up in arrival order
+            result = await db.execute(
+                select(
+                    Transcription.id,
+                    Transcription.participant_name,
+                    Transcription.transcribed_text,
+                    Transcription.timestamp,
+                    Transcription.start_time
+                )
+                .where(Transcription.conversation_id == conversation_pk, Transcription.rolling_folded.is_(False))
+                .order_by(Transcription.id)
+                .limit(self.max_rows)
+            )
+            rows = result.all()
+        if not rows:
+            return
+
+        # Presented to the model in speaking order
+        segment = [
+            {
+                "participant_name": row.participant_name,
+                "transcribed_text": row.transcribed_text,
+                "timestamp": row.timestamp.isoformat(),
+                "start_time": row.start_time or 0
+            }
+            for row in sorted(rows, key=lambda row: (row.start_time or 0, row.id))
+        ]
+        rolling_summary = await self.summarization_service.fold_summary(
+            conversation.rolling_summary, segment, language="indonesian"
+        )
+
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(Conversation)
+                .where(
+                    Conversation.id == conversation_pk,
+                    Conversation.status == ConversationStatus.ACTIVE,
+                    Conversation.rolling_summary_at.is_not_distinct_from(conversation.rolling_summary_at)
+                )
+                .values(rolling_summary=rolling_summary, rolling_summary_at=func.now())
+            )
+            if not result.rowcount:
+                # Another fold got there first, or the conversation has ended
+                await db.rollback()
+                return
+            await db.execute(
+                update(Transcription)
+                .where(Transcription.id.in_([row.id for row in rows]))
+                .values(rolling_folded=True)
+            )
+            await db.commit()
+        self.folds += 1
+        self.folded_rows += len(rows)
+        logger.info(f"Folded {len(rows)} transcriptions into the rolling summary of conversation {conversation_pk}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.queue.get_stats()
+        stats.update({
+            "enabled": self.enabled,
+            "folds": self.folds,
+            "folded_rows": self.folded_rows
+        })
+        return stats
@@ -2,43 +2,143 @@
 
 import asyncio
 import io
+import os
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import torch
-from transformers import Wav2Vec2ForCTC, Wav2Vec2Tokenizer, Wav2Vec2Processor
-import librosa
 import logging
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 import time
 
+from services.import_timing import get_import_times, timed_import
+from services.process_memory import get_process_memory
+from services.audio_buffers import BufferPool
+from services.audio_formats import is_wav, parse_pcm_format, pcm_to_float32, read_wav
+from services.stt_batching import STTBatchScheduler
+from services.stt_cache import TranscriptionCache
+from services.vad import EnergyVAD
+
 logger = logging.getLogger(__name__)
 
+# Inference backends selectable through STT_BACKEND
+STT_BACKENDS = ("torch", "torch-int8", "onnx")
+
 class IndonesianSTTService:
-    def __init__(self):
+    def __init__(self, backend: Optional[str] = None):
         self.model = None
+        self.model_config = None
         self.processor = None
-        self.tokenizer = None
         self.sample_rate = 16000
         self.model_name = "indonesian-nlp/wav2vec2-indonesian-javanese-sundanese"
+        self.model_version = os.getenv("STT_MODEL_VERSION", "wav2vec2-indonesian")
+        
+        # fp32 PyTorch, dynamically quantized int8 PyTorch, or an exported ONNX graph
+        self.backend = (backend or os.getenv("STT_BACKEND", "torch")).lower()
+        if self.backend not in STT_BACKENDS:
+            raise ValueError(f"Unknown STT backend '{self.backend}', expected one of {STT_BACKENDS}")
+        self.onnx_path = os.getenv("STT_ONNX_PATH", "onnx/wav2vec2-indonesian.onnx")
+        
+        # Decode, preprocessing and inference run in a bounded thread pool so
+        # the event loop keeps serving API requests during transcription
+        self.worker_threads = int(os.getenv("STT_WORKER_THREADS", "2"))
+        self.torch_threads = int(os.getenv("STT_TORCH_THREADS", "0"))
+        self.max_concurrency = int(os.getenv("STT_MAX_CONCURRENCY", "8"))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._concurrency_limit = asyncio.Semaphore(self.max_concurrency)
+        self._in_flight = 0
+        self._init_lock = asyncio.Lock()
+        
+        # Audio longer than the threshold is transcribed in overlapping windows
+        self.long_audio_threshold = int(float(os.getenv("STT_LONG_AUDIO_THRESHOLD_S", "30")) * self.sample_rate)
+        self.window_length = int(float(os.getenv("STT_WINDOW_S", "20")) * self.sample_rate)
+        self.window_overlap = int(float(os.getenv("STT_WINDOW_OVERLAP_S", "2")) * self.sample_rate)
+        self.window_batch_size = int(os.getenv("STT_WINDOW_BATCH_SIZE", "4"))
+        if self.window_length - 2 * self.window_overlap <= 0:
+            raise ValueError(
+                f"STT_WINDOW_OVERLAP_S must be less than half of STT_WINDOW_S "
+                f"(got {self.window_overlap / self.sample_rate:g}s overlap for {self.window_length / self.sample_rate:g}s windows)"
+            )
+        
+        # Batch inputs are normalized and padded in place inside pooled buffers
+        self.min_input_length = int(0.5 * self.sample_rate)  # 0.5 seconds minimum
+        self.normalize_inputs = True
+        self.padding_value = 0.0
+        self.input_buffers = BufferPool(np.float32)
+        self.mask_buffers = BufferPool(np.int64)
         
+        # Silent chunks are dropped before they reach the model
+        self.vad_enabled = os.getenv("STT_VAD_ENABLED", "true").lower() == "true"
+        self.vad = EnergyVAD(sample_rate=self.sample_rate)
+        
+        # Identical (e.g. re-uploaded) chunks are answered from the cache
+        self.cache = TranscriptionCache(namespace=f"{self.model_name}:{self.model_version}:{self.backend}")
+        
+        # Concurrent requests share forward passes through the batch scheduler
+        self.batch_scheduler = STTBatchScheduler(
+            self._run_batch_inference,
+            max_inflight_batches=self.worker_threads
+        )
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the inference thread pool on first use"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.worker_threads,
+                thread_name_prefix="stt-worker"
+            )
+        return self._executor
+    
+    async def _run_in_executor(self, func, *args):
+        """Run a blocking call in the inference thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), func, *args)
+    
     async def initialize(self):
         """Initialize the Wav2Vec2 model for Indonesian"""
+        async with self._init_lock:
+            if self.model is None:
+                await self._run_in_executor(self._load_model)
+    
+    def _load_model(self):
+        """Load model components (blocking)"""
         try:
             logger.info("Loading Indonesian Wav2Vec2 model...")
             
-            # Load model components
-            self.processor = Wav2Vec2Processor.from_pretrained(self.model_name)
-            self.model = Wav2Vec2ForCTC.from_pretrained(self.model_name)
-            self.tokenizer = Wav2Vec2Tokenizer.from_pretrained(self.model_name)
+            # torch/transformers are only imported once a model is actually needed
+            torch = timed_import("torch")
+            transformers = timed_import("transformers")
+            
+            torch_threads = self._configure_torch_threads()
             
-            # Set model to evaluation mode
-            self.model.eval()
+            # Load model components; the processor already carries the CTC tokenizer
+            self.processor = transformers.Wav2Vec2Processor.from_pretrained(self.model_name)
+            self.normalize_inputs = self.processor.feature_extractor.do_normalize
+            self.padding_value = float(self.processor.feature_extractor.padding_value)
             
-            # Move to GPU if available
-            if torch.cuda.is_available():
-                self.model = self.model.cuda()
-                logger.info("Model loaded on GPU")
+            if self.backend == "onnx":
+                model_config = transformers.Wav2Vec2Config.from_pretrained(self.model_name)
+                model = self._load_onnx_session(torch_threads)
+                logger.info(f"Model loaded from ONNX graph {self.onnx_path}")
             else:
-                logger.info("Model loaded on CPU")
+                model = transformers.Wav2Vec2ForCTC.from_pretrained(self.model_name)
+                model_config = model.config
+                
+                # Set model to evaluation mode
+                model.eval()
+                
+                if self.backend == "torch-int8":
+                    # Dynamic int8 quantization of the transformer's linear layers (CPU only)
+                    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                    logger.info("Model loaded on CPU with dynamic int8 quantization")
+                elif torch.cuda.is_available():
+                    # Move to GPU if available
+                    model = model.cuda()
+                    logger.info("Model loaded on GPU")
+                else:
+                    logger.info("Model loaded on CPU")
+            
+            # Publish the model only once it is ready for inference
+            self.model_config = model_config
+            self.model = model
                 
             logger.info("Indonesian STT model initialized successfully")
             
@@ -46,34 +146,79 @@ class IndonesianSTTService:
             logger.error(f"Failed to initialize STT model: {e}")
             raise
     
-    async def transcribe_audio(self, audio_data: bytes) -> Tuple[str, float, float]:
+    def _configure_torch_threads(self) -> int:
+        """Split CPU cores between the pool threads instead of oversubscribing"""
+        torch = timed_import("torch")
+        torch_threads = self.torch_threads or max(1, (os.cpu_count() or 1) // self.worker_threads)
+        torch.set_num_threads(torch_threads)
+        logger.info(f"STT using {self.worker_threads} worker threads x {torch_threads} torch threads")
+        return torch_threads
+    
+    def preload(self):
+        """
+        Load the model in a pre-fork master process (blocking)
+        
+        Forked workers then share the weight pages copy-on-write instead of
+        each loading a private copy. Must run before any inference, so no
+        executor or torch thread pool exists yet at fork time.
+        """
+        if self.backend == "onnx":
+            # onnxruntime starts its thread pools at session creation, which
+            # does not survive fork; each worker loads its own session instead
+            logger.warning("STT preload skipped: the onnx backend is loaded per worker")
+            return
+        if self.backend == "torch" and timed_import("torch").cuda.is_available():
+            # A CUDA context cannot be inherited across fork
+            logger.warning("STT preload skipped: GPU models are loaded per worker")
+            return
+        if self.model is None:
+            self._load_model()
+    
+    def after_fork(self):
+        """Reset per-process state in a worker forked from a preloaded master"""
+        if self.model is not None and self.backend != "onnx":
+            self._configure_torch_threads()
+    
+    def _load_onnx_session(self, num_threads: int):
+        """Create an onnxruntime CPU session for the exported graph"""
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError("STT_BACKEND=onnx requires the onnxruntime package")
+        
+        if not os.path.exists(self.onnx_path):
+            raise RuntimeError(
+                f"ONNX model not found at {self.onnx_path}, run scripts/export_stt_onnx.py export first"
+            )
+        
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(self.onnx_path, options, providers=["CPUExecutionProvider"])
+    
+    async def transcribe_audio(self, audio_data: bytes, content_type: Optional[str] = None) -> Tuple[str, float, float]:
         """
         Transcribe audio data to text
         
+        Args:
+            audio_data: Encoded audio, or raw PCM when content_type declares it
+            content_type: e.g. 'audio/pcm; encoding=s16le; rate=16000' or 'audio/wav'
+        
         Returns:
             Tuple of (transcribed_text, confidence_score, processing_time)
         """
         start_time = time.time()
         
         try:
-            if self.model is None:
-                await self.initialize()
-            
-            # Convert bytes to audio array
-            audio_array = self._bytes_to_audio_array(audio_data)
-            
-            # Preprocess audio
-            audio_array = self._preprocess_audio(audio_array)
-            
-            # Run inference
-            transcription = await self._run_inference(audio_array)
+            cache_key = self.cache.make_key(audio_data, content_type)
+            transcription, confidence = await self.cache.get_or_compute(
+                cache_key,
+                lambda: self._transcribe_uncached(audio_data, content_type),
+                self._run_in_executor
+            )
             
             processing_time = (time.time() - start_time) * 1000  # Convert to ms
             
-            # For simplicity, we'll use a mock confidence score
-            # In production, you'd calculate this from the model outputs
-            confidence = 0.85
-            
             logger.info(f"Transcription completed in {processing_time:.2f}ms: {transcription[:50]}...")
             
             return transcription, confidence, processing_time
@@ -82,10 +227,87 @@ class IndonesianSTTService:
             logger.error(f"Transcription error: {e}")
             raise
     
-    def _bytes_to_audio_array(self, audio_data: bytes) -> np.ndarray:
+    async def _transcribe_uncached(self, audio_data: bytes, content_type: Optional[str]) -> Tuple[str, float]:
+        """Decode and run the model, returning (transcribed_text, confidence_score)"""
+        if self.model is None:
+            await self.initialize()
+        
+        async with self._concurrency_limit:
+            self._in_flight += 1
+            try:
+                # Decode and preprocess off the event loop
+                audio_array = await self._run_in_executor(self._prepare_audio, audio_data, content_type)
+                
+                if audio_array is None:
+                    # No speech detected, skip the model entirely
+                    return "", 0.0
+                
+                # Run inference (batched with concurrently arriving chunks)
+                transcription = await self.batch_scheduler.submit(audio_array)
+            finally:
+                self._in_flight -= 1
+        
+        # For simplicity, we'll use a mock confidence score
+        # In production, you'd calculate this from the model outputs
+        confidence = 0.85
+        
+        return transcription, confidence
+    
+    async def transcribe_samples(self, audio_array: np.ndarray) -> Tuple[str, float, float]:
+        """
+        Transcribe a decoded chunk of a stream (e.g. WebM) after VAD trimming
+        
+        Returns:
+            Tuple of (transcribed_text, confidence_score, processing_time)
+        """
+        start_time = time.time()
+        audio_array, _ = self.vad.trim(audio_array) if self.vad_enabled else (audio_array, 0.0)
+        transcription = "" if audio_array is None else await self.transcribe_array(audio_array)
+        confidence = 0.85 if transcription else 0.0
+        return transcription, confidence, (time.time() - start_time) * 1000
+    
+    async def transcribe_array(self, audio_array: np.ndarray) -> str:
+        """Transcribe already decoded 16 kHz mono samples (no cache or VAD), e.g. for streaming"""
+        if self.model is None:
+            await self.initialize()
+        
+        async with self._concurrency_limit:
+            self._in_flight += 1
+            try:
+                return await self.batch_scheduler.submit(self._preprocess_audio(audio_array))
+            finally:
+                self._in_flight -= 1
+    
+    def _prepare_audio(self, audio_data: bytes, content_type: Optional[str] = None) -> Optional[np.ndarray]:
+        """Decode, trim silence and preprocess audio bytes (blocking)"""
+        audio_array = self._bytes_to_audio_array(audio_data, content_type)
+        
+        if self.vad_enabled:
+            audio_array, skipped_seconds = self.vad.trim(audio_array)
+            if audio_array is None:
+                logger.info(f"VAD dropped silent chunk ({skipped_seconds:.2f}s)")
+                return None
+            if skipped_seconds > 0:
+                logger.debug(f"VAD trimmed {skipped_seconds:.2f}s of silence")
+        
+        return self._preprocess_audio(audio_array)
+    
+    def _bytes_to_audio_array(self, audio_data: bytes, content_type: Optional[str] = None) -> np.ndarray:
         """Convert audio bytes to numpy array"""
         try:
+            # Raw PCM: reinterpret the upload buffer directly
+            pcm_format = parse_pcm_format(content_type)
+            if pcm_format is not None:
+                audio_array, sample_rate = pcm_to_float32(audio_data, pcm_format)
+                return self._resample_if_needed(audio_array, sample_rate)
+            
+            # WAV: trust the header and only resample when the rate differs
+            if is_wav(audio_data, content_type):
+                audio_array, sample_rate = read_wav(audio_data)
+                return self._resample_if_needed(audio_array, sample_rate)
+            
             # Convert bytes to audio array using librosa
+            librosa = timed_import("librosa")
             audio_io = io.BytesIO(audio_data)
             audio_array, _ = librosa.load(audio_io, sr=self.sample_rate)
             return audio_array
@@ -93,50 +315,204 @@ class IndonesianSTTService:
             logger.error(f"Audio conversion error: {e}")
             raise ValueError("Invalid audio data format")
     
+    def _resample_if_needed(self, audio_array: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Resample to the model rate only when the source rate differs"""
+        if sample_rate == self.sample_rate:
+            return audio_array
+        return timed_import("librosa").resample(audio_array, orig_sr=sample_rate, target_sr=self.sample_rate)
+    
     def _preprocess_audio(self, audio_array: np.ndarray) -> np.ndarray:
-        """Preprocess audio for the model"""
-        # Normalize audio
-        if np.max(np.abs(audio_array)) > 0:
-            audio_array = audio_array / np.max(np.abs(audio_array))
+        """Preprocess audio for the model
         
-        # Ensure minimum length (pad if necessary)
-        min_length = int(0.5 * self.sample_rate)  # 0.5 seconds minimum
-        if len(audio_array) < min_length:
-            audio_array = np.pad(audio_array, (0, min_length - len(audio_array)))
+        Only ensures float32 (without copying when it already is). Normalization and
+        minimum-length padding happen in place in _build_batch; the old peak
+        normalization was redundant with the zero-mean unit-variance step.
+        """
+        return np.asarray(audio_array, dtype=np.float32)
+    
+    def _build_batch(self, audio_arrays: List[np.ndarray], input_values: np.ndarray, attention_mask: np.ndarray):
+        """
+        Normalize and pad a batch into preallocated (batch, length) buffers
         
-        return audio_array
+        Matches Wav2Vec2FeatureExtractor: per-row zero-mean unit-variance over the
+        valid samples, padding_value after them. Row statistics come from one read
+        of the source; the row is then written once and scaled in place.
+        """
+        for row, audio_array in enumerate(audio_arrays):
+            num_samples = len(audio_array)
+            # Short chunks are padded with silence that counts as real input
+            valid = max(num_samples, self.min_input_length)
+            target = input_values[row]
+            
+            if self.normalize_inputs:
+                total = float(audio_array.sum(dtype=np.float64))
+                total_sq = float(np.einsum("i,i->", audio_array, audio_array, dtype=np.float64))
+                mean = total / valid
+                variance = max(total_sq / valid - mean * mean, 0.0)
+                scale = np.float32(1.0 / np.sqrt(variance + 1e-7))
+                
+                np.subtract(audio_array, np.float32(mean), out=target[:num_samples])
+                target[num_samples:valid] = -mean
+                target[:valid] *= scale
+            else:
+                target[:num_samples] = audio_array
+                target[num_samples:valid] = 0.0
+            
+            target[valid:] = self.padding_value
+            attention_mask[row, :valid] = 1
+            attention_mask[row, valid:] = 0
     
     async def _run_inference(self, audio_array: np.ndarray) -> str:
         """Run model inference"""
+        transcriptions = await self._run_batch_inference([audio_array])
+        return transcriptions[0]
+    
+    async def _run_batch_inference(self, audio_arrays: List[np.ndarray]) -> List[str]:
+        """Run batch inference in the worker pool"""
+        return await self._run_in_executor(self._run_batch_inference_sync, audio_arrays)
+    
+    def _run_batch_inference_sync(self, audio_arrays: List[np.ndarray]) -> List[str]:
+        """Run model inference on a padded batch of audio arrays (blocking)"""
         try:
-            # Process audio
-            input_values = self.processor(
-                audio_array, 
-                sampling_rate=self.sample_rate, 
-                return_tensors="pt"
-            ).input_values
-            
-            # Move to GPU if available
-            if torch.cuda.is_available():
-                input_values = input_values.cuda()
+            transcriptions: List[Optional[str]] = [None] * len(audio_arrays)
             
-            # Run inference
-            with torch.no_grad():
-                logits = self.model(input_values).logits
+            # Long inputs go through overlapping windows to bound attention memory
+            short_indices = []
+            for index, audio_array in enumerate(audio_arrays):
+                if len(audio_array) > self.long_audio_threshold:
+                    transcriptions[index] = self._transcribe_long_sync(audio_array)
+                else:
+                    short_indices.append(index)
             
-            # Decode predictions
-            predicted_ids = torch.argmax(logits, dim=-1)
-            transcription = self.processor.decode(predicted_ids[0])
+            if short_indices:
+                predicted = self._predict_ids_batch([audio_arrays[i] for i in short_indices])
+                for index, ids in zip(short_indices, predicted):
+                    transcriptions[index] = self._clean_transcription(self.processor.decode(ids))
             
-            # Clean up transcription
-            transcription = self._clean_transcription(transcription)
-            
-            return transcription
+            return transcriptions
             
         except Exception as e:
             logger.error(f"Inference error: {e}")
             raise
     
+    def _predict_ids_batch(self, audio_arrays: List[np.ndarray]) -> List[np.ndarray]:
+        """Greedy CTC token ids for each array, trimmed to its own valid frames"""
+        # Pad into a single tensor; the mask keeps padding out of attention
+        length = max(self.min_input_length, max(len(audio_array) for audio_array in audio_arrays))
+        shape = (len(audio_arrays), length)
+        
+        with self.input_buffers.borrow(shape) as input_values, self.mask_buffers.borrow(shape) as attention_mask:
+            self._build_batch(audio_arrays, input_values, attention_mask)
+            
+            # Run inference
+            logits = self._forward_logits(input_values, attention_mask)
+            valid_lengths = attention_mask.sum(-1)
+        
+        # Ignore frames that only cover padding
+        predicted_ids = np.argmax(logits, axis=-1)
+        output_lengths = self._feat_extract_output_lengths(valid_lengths)
+        return [ids[:length] for ids, length in zip(predicted_ids, output_lengths.tolist())]
+    
+    def _transcribe_long_sync(self, audio_array: np.ndarray) -> str:
+        """
+        Transcribe long audio with overlapping windows (blocking)
+        
+        Each window carries `window_overlap` samples of context on both sides. Only
+        the logit frames of its central region are kept, so the stitched CTC output
+        covers every sample once, and peak memory depends on the window and batch
+        size rather than the input length.
+        """
+        samples_per_frame = int(np.prod(self.model_config.conv_stride))
+        step = self.window_length - 2 * self.window_overlap
+        total = len(audio_array)
+        
+        # (window_start, window_end, keep_start, keep_end) in samples
+        windows = []
+        for keep_start in range(0, total, step):
+            keep_end = min(keep_start + step, total)
+            windows.append((
+                max(0, keep_start - self.window_overlap),
+                min(total, keep_end + self.window_overlap),
+                keep_start,
+                keep_end
+            ))
+        
+        stitched_ids = []
+        for batch_start in range(0, len(windows), self.window_batch_size):
+            batch = windows[batch_start:batch_start + self.window_batch_size]
+            predicted = self._predict_ids_batch([audio_array[start:end] for start, end, _, _ in batch])
+            
+            for (window_start, _, keep_start, keep_end), ids in zip(batch, predicted):
+                first_frame = (keep_start - window_start) // samples_per_frame
+                last_frame = (keep_end - window_start) // samples_per_frame
+                stitched_ids.append(ids[first_frame:last_frame])
+        
+        logger.info(f"Long audio transcribed in {len(windows)} windows ({total / self.sample_rate:.1f}s)")
+        
+        # CTC decoding merges repeats across window boundaries
+        return self._clean_transcription(self.processor.decode(np.concatenate(stitched_ids)))
+    
+    def _forward_logits(self, input_values: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Run the selected backend and return CTC logits as a NumPy array"""
+        use_attention_mask = self.processor.feature_extractor.return_attention_mask
+        
+        if self.backend == "onnx":
+            feeds = {"input_values": input_values}
+            if use_attention_mask and "attention_mask" in {i.name for i in self.model.get_inputs()}:
+                feeds["attention_mask"] = attention_mask.astype(np.int64, copy=False)
+            return self.model.run(["logits"], feeds)[0]
+        
+        # torch.from_numpy shares memory with the pooled buffers
+        torch = timed_import("torch")
+        input_tensor = torch.from_numpy(input_values)
+        mask_tensor = torch.from_numpy(attention_mask)
+        
+        # Move to GPU if available
+        if self.backend == "torch" and torch.cuda.is_available():
+            input_tensor = input_tensor.cuda()
+            mask_tensor = mask_tensor.cuda()
+        
+        with torch.no_grad():
+            if use_attention_mask:
+                logits = self.model(input_tensor, attention_mask=mask_tensor).logits
+            else:
+                logits = self.model(input_tensor).logits
+        
+        return logits.cpu().numpy()
+    
+    def _feat_extract_output_lengths(self, input_lengths: np.ndarray) -> np.ndarray:
+        """Number of logit frames produced for each input length"""
+        lengths = np.asarray(input_lengths, dtype=np.int64)
+        for kernel_size, stride in zip(self.model_config.conv_kernel, self.model_config.conv_stride):
+            lengths = (lengths - kernel_size) // stride + 1
+        return lengths
+    
+    def get_stats(self) -> dict:
+        """Runtime statistics for the STT pipeline"""
+        return {
+            "model_name": self.model_name,
+            "backend": self.backend,
+            "model_loaded": self.model is not None,
+            "worker_threads": self.worker_threads,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "batching": self.batch_scheduler.get_stats(),
+            "cache": self.cache.get_stats(),
+            "buffers": {
+                "input_values": self.input_buffers.get_stats(),
+                "attention_mask": self.mask_buffers.get_stats()
+            },
+            "import_times_ms": get_import_times(),
+            "memory": get_process_memory(),
+            "vad": self.vad.get_stats() if self.vad_enabled else {"enabled": False}
+        }
+    
+    def shutdown(self):
+        """Stop the inference thread pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
     def _clean_transcription(self, text: str) -> str:
         """Clean and normalize transcription"""
         # Remove extra whitespace
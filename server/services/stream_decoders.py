@@ -0,0 +1,260 @@
+# services/stream_decoders.py - Stateful decoding of browser MediaRecorder (WebM/Opus) streams
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Every WebM stream starts with an EBML header; later MediaRecorder chunks are bare clusters
+EBML_MAGIC = b"\x1a\x45\xdf\xa3"
+
+
+class FFmpegStreamDecoder:
+    """
+    One long-lived ffmpeg process decoding a single WebM/Opus stream to 16 kHz mono float32
+
+    Chunks are written to ffmpeg's stdin as they arrive, so the container header
+    from the first chunk and the Opus decoder state carry over to later chunks and
+    every byte is decoded exactly once.
+    """
+
+    def __init__(self, sample_rate: int = 16000, settle_ms: Optional[int] = None, max_wait_ms: int = 1000):
+        self.sample_rate = sample_rate
+        self.settle = (settle_ms if settle_ms is not None else int(os.getenv("STT_STREAM_DECODER_SETTLE_MS", "50"))) / 1000
+        self.max_wait = max_wait_ms / 1000
+
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._output = bytearray()
+        self._output_event = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+        self.last_used = time.monotonic()
+        self.bytes_in = 0
+        self.samples_out = 0
+        # Caller's description of the latest chunk (see StreamDecoderRegistry.decode)
+        self.context: Any = None
+        self.context_samples = 0
+
+    async def start(self):
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                "ffmpeg", "-hide_banner", "-loglevel", "error",
+                # Start decoding as soon as the header is parsed instead of probing ahead
+                "-fflags", "nobuffer", "-probesize", "4096", "-analyzeduration", "0",
+                "-f", "webm", "-i", "pipe:0",
+                "-f", "f32le", "-ac", "1", "-ar", str(self.sample_rate), "pipe:1",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except FileNotFoundError:
+            raise RuntimeError("Decoding WebM audio requires ffmpeg on the PATH")
+        self._reader = asyncio.get_running_loop().create_task(self._read_output())
+
+    async def _read_output(self):
+        while True:
+            data = await self.process.stdout.read(65536)
+            if not data:
+                break
+            self._output += data
+            self._output_event.set()
+        self._output_event.set()
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.returncode is None and not self._reader.done()
+
+    async def decode(self, chunk: bytes) -> np.ndarray:
+        """Feed the next chunk and return the samples ffmpeg produced for it"""
+        async with self._lock:
+            if not self.running:
+                raise ValueError("WebM stream decoder has exited (corrupt or truncated stream)")
+
+            self.last_used = time.monotonic()
+            self.bytes_in += len(chunk)
+            self._output_event.clear()
+            try:
+                self.process.stdin.write(chunk)
+                await self.process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                # ffmpeg exited between the running check and the write
+                raise ValueError("WebM stream decoder has exited (corrupt or truncated stream)")
+
+            # ffmpeg answers asynchronously: wait up to max_wait for its first output
+            # (it may still be starting up), then collect until it goes quiet
+            deadline = time.monotonic() + self.max_wait
+            got_output = False
+            while not self._reader.done():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(
+                        self._output_event.wait(),
+                        min(self.settle, remaining) if got_output else remaining
+                    )
+                except asyncio.TimeoutError:
+                    break
+                self._output_event.clear()
+                got_output = True
+
+            return self._take_samples()
+
+    async def close(self) -> np.ndarray:
+        """End the stream and return the samples still buffered inside ffmpeg"""
+        async with self._lock:
+            if self.process is None:
+                return np.zeros(0, dtype=np.float32)
+            try:
+                if self.process.returncode is None:
+                    self.process.stdin.close()
+                await asyncio.wait_for(self._reader, self.max_wait)
+                await asyncio.wait_for(self.process.wait(), self.max_wait)
+            except (asyncio.TimeoutError, BrokenPipeError, ConnectionResetError):
+                if self.process.returncode is None:
+                    self.process.kill()
+                self._reader.cancel()
+            return self._take_samples()
+
+    def _take_samples(self) -> np.ndarray:
+        # Leave a partial trailing float for the next read
+        usable = len(self._output) - len(self._output) % 4
+        samples = np.frombuffer(self._output, dtype="<f4", count=usable // 4).copy()
+        del self._output[:usable]
+        self.samples_out += len(samples)
+        return samples
+
+
+class StreamDecoderRegistry:
+    """
+    Persistent decoders keyed by participant stream, e.g. (conversation_id, participant_identity)
+
+    A chunk that starts with a new EBML header (recorder restarted) replaces the
+    stream's decoder; decoders idle for longer than idle_timeout are closed by a
+    background sweep (see start()), so no upload pays for another stream's tail.
+    Decoders live in this process, so all chunks of a stream must reach it.
+
+    Closing a decoder flushes the end of the recording still buffered in ffmpeg;
+    it is handed to on_tail(key, context, samples, offset_s) together with the
+    context of the stream's last chunk and how far into that chunk the tail starts.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        idle_timeout_s: Optional[float] = None,
+        on_tail: Optional[Callable[[Hashable, Any, np.ndarray, float], Awaitable[None]]] = None
+    ):
+        self.sample_rate = sample_rate
+        self.on_tail = on_tail
+        self.idle_timeout = idle_timeout_s if idle_timeout_s is not None else float(
+            os.getenv("STT_STREAM_DECODER_IDLE_S", "120")
+        )
+        self._decoders: Dict[Hashable, FFmpegStreamDecoder] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+
+        self.streams_started = 0
+        self.streams_expired = 0
+        self.tails_flushed = 0
+
+    def start(self):
+        """Start closing idle decoders in the background on the running event loop"""
+        if self._sweeper is None:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_loop(), name="stream-decoder-sweep")
+
+    async def stop(self):
+        """Stop the idle sweep and close every decoder, handling their tails"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+        await self.close_all()
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(min(30.0, max(1.0, self.idle_timeout / 4)))
+            try:
+                await self._close_idle()
+            except Exception as e:
+                logger.error(f"Closing idle WebM stream decoders failed: {e}")
+
+    async def decode(self, key: Hashable, chunk: bytes, context: Any = None) -> np.ndarray:
+        """
+        Decode the next chunk of a stream to 16 kHz mono float32 samples
+
+        context describes the chunk (e.g. its start time) and is passed back to
+        on_tail if the stream ends after this chunk.
+        """
+        decoder = self._decoders.get(key)
+        if chunk[:4] == EBML_MAGIC:
+            if decoder is not None:
+                # The old stream ended: flush what was still inside its decoder
+                await self._close(key)
+            decoder = await self._open(key)
+        elif decoder is None or not decoder.running:
+            self._decoders.pop(key, None)
+            raise ValueError("WebM chunk without a stream header; restart the recorder to send a new header")
+
+        try:
+            samples = await decoder.decode(chunk)
+        except ValueError:
+            await self._close(key)
+            raise
+        decoder.context = context
+        decoder.context_samples = len(samples)
+        return samples
+
+    async def _open(self, key: Hashable) -> FFmpegStreamDecoder:
+        decoder = FFmpegStreamDecoder(sample_rate=self.sample_rate)
+        await decoder.start()
+        self._decoders[key] = decoder
+        self.streams_started += 1
+        return decoder
+
+    async def _close(self, key: Hashable) -> np.ndarray:
+        """Close a stream's decoder, passing the flushed tail to on_tail"""
+        decoder = self._decoders.pop(key, None)
+        if decoder is None:
+            return np.zeros(0, dtype=np.float32)
+        tail = await decoder.close()
+        if len(tail) and self.on_tail is not None:
+            self.tails_flushed += 1
+            try:
+                await self.on_tail(key, decoder.context, tail, decoder.context_samples / self.sample_rate)
+            except Exception as e:
+                logger.error(f"Failed to handle the tail of WebM stream {key}: {e}")
+        return tail
+
+    async def _close_idle(self):
+        now = time.monotonic()
+        for key in [k for k, d in self._decoders.items() if now - d.last_used > self.idle_timeout]:
+            logger.info(f"Closing idle WebM stream decoder {key}")
+            self.streams_expired += 1
+            await self._close(key)
+
+    async def close_matching(self, predicate) -> int:
+        """Close the decoders whose key matches, e.g. all streams of an ended conversation; tails are handled before returning"""
+        keys = [key for key in self._decoders if predicate(key)]
+        for key in keys:
+            await self._close(key)
+        return len(keys)
+
+    async def close_all(self):
+        for key in list(self._decoders):
+            await self._close(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "active_streams": len(self._decoders),
+            "streams_started": self.streams_started,
+            "streams_expired": self.streams_expired,
+            "tails_flushed": self.tails_flushed,
+            "bytes_decoded": sum(d.bytes_in for d in self._decoders.values()),
+            "seconds_decoded": round(sum(d.samples_out for d in self._decoders.values()) / self.sample_rate, 2)
+        }
@@ -0,0 +1,154 @@
+# services/stt_batching.py - Dynamic micro-batching for STT inference
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BatchRunner = Callable[[List[np.ndarray]], Awaitable[List[str]]]
+
+
+class STTBatchScheduler:
+    """Collects concurrently arriving audio chunks into batches for one forward pass"""
+
+    def __init__(
+        self,
+        run_batch: BatchRunner,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        max_inflight_batches: int = 1
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size or int(os.getenv("STT_MAX_BATCH_SIZE", "8"))
+        self.max_wait_ms = max_wait_ms if max_wait_ms is not None else float(
+            os.getenv("STT_MAX_BATCH_WAIT_MS", "20")
+        )
+
+        self.max_inflight_batches = max_inflight_batches
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Semaphore] = None
+        self._inflight_tasks: set = set()
+
+        # Tuning statistics
+        self._batches_processed = 0
+        self._items_processed = 0
+        self._batches_failed = 0
+        self._items_failed = 0
+        self._batch_size_histogram: Dict[int, int] = {}
+        self._max_queue_depth = 0
+        self._total_queue_wait_ms = 0.0
+        self._total_batch_time_ms = 0.0
+
+    async def submit(self, audio_array: np.ndarray) -> str:
+        """Queue one preprocessed audio array and wait for its transcription"""
+        self._ensure_worker()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        await self._queue.put((audio_array, future, time.monotonic()))
+        self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+
+        return await future
+
+    def _ensure_worker(self):
+        """Start the batching loop on the current event loop if needed"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._inflight = asyncio.Semaphore(self.max_inflight_batches)
+            self._worker = asyncio.create_task(self._batch_loop())
+            logger.info(
+                f"STT batch scheduler started (max_batch_size={self.max_batch_size}, "
+                f"max_wait_ms={self.max_wait_ms})"
+            )
+
+    async def _batch_loop(self):
+        """Gather items until the batch is full or the wait window closes"""
+        while True:
+            # Keep gathering while earlier batches are still running
+            await self._inflight.acquire()
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+
+            while len(batch) < self.max_batch_size:
+                # Take everything already queued before waiting for stragglers
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            task = asyncio.create_task(self._process_batch(batch))
+            self._inflight_tasks.add(task)
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task: asyncio.Task):
+        """Free the in-flight slot held by a finished batch"""
+        self._inflight_tasks.discard(task)
+        self._inflight.release()
+
+    async def _process_batch(self, batch: List[Tuple[np.ndarray, asyncio.Future, float]]):
+        """Run one forward pass and fan results back out to the waiting requests"""
+        # Requests cancelled while queued do not need a slot in the batch
+        batch = [item for item in batch if not item[1].done()]
+        if not batch:
+            return
+
+        started = time.monotonic()
+        for _, _, enqueued_at in batch:
+            self._total_queue_wait_ms += (started - enqueued_at) * 1000
+
+        try:
+            results = await self.run_batch([audio for audio, _, _ in batch])
+        except Exception as e:
+            logger.error(f"Batch inference error (batch_size={len(batch)}): {e}")
+            self._batches_failed += 1
+            self._items_failed += len(batch)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), text in zip(batch, results):
+            if not future.done():
+                future.set_result(text)
+
+        self._batches_processed += 1
+        self._items_processed += len(batch)
+        self._batch_size_histogram[len(batch)] = self._batch_size_histogram.get(len(batch), 0) + 1
+        self._total_batch_time_ms += (time.monotonic() - started) * 1000
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and batch size statistics for tuning"""
+        batches = self._batches_processed
+        items = self._items_processed
+        # Queue waits are recorded for every batch that ran, failed or not
+        waited = items + self._items_failed
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "max_inflight_batches": self.max_inflight_batches,
+            "inflight_batches": len(self._inflight_tasks),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue_depth": self._max_queue_depth,
+            "batches_processed": batches,
+            "items_processed": items,
+            "batches_failed": self._batches_failed,
+            "items_failed": self._items_failed,
+            "average_batch_size": round(items / batches, 2) if batches else 0.0,
+            "batch_size_histogram": dict(sorted(self._batch_size_histogram.items())),
+            "average_queue_wait_ms": round(self._total_queue_wait_ms / waited, 2) if waited else 0.0,
+            "average_batch_time_ms": round(self._total_batch_time_ms / batches, 2) if batches else 0.0
+        }
@@ -0,0 +1,145 @@
+# services/stt_cache.py - Content-hash cache for transcription results
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CachedResult = Tuple[str, float]
+
+
+class TranscriptionCache:
+    """
+    In-memory LRU of transcripts keyed by audio content hash, with an optional disk tier
+
+    Keys include the model name and version so a model change never serves stale text.
+    Identical chunks arriving while the first is still being transcribed share its result.
+    """
+
+    def __init__(self, namespace: str, max_entries: Optional[int] = None, disk_dir: Optional[str] = None):
+        self.namespace = namespace.encode()
+        self.enabled = os.getenv("STT_CACHE_ENABLED", "true").lower() == "true"
+        self.max_entries = max_entries or int(os.getenv("STT_CACHE_SIZE", "1024"))
+        self.disk_dir = disk_dir or os.getenv("STT_CACHE_DIR") or None
+
+        self._entries: "OrderedDict[str, CachedResult]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    def make_key(self, audio_data: bytes, content_type: Optional[str] = None) -> str:
+        """Hash of the audio bytes, how they are to be decoded, and the model identity"""
+        digest = hashlib.blake2b(audio_data, digest_size=20)
+        digest.update(b"\0" + (content_type or "").encode())
+        digest.update(b"\0" + self.namespace)
+        return digest.hexdigest()
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[CachedResult]],
+        run_blocking: Callable[..., Awaitable[Any]]
+    ) -> CachedResult:
+        """Return the cached result for key, or compute and store it"""
+        if not self.enabled:
+            return await compute()
+
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        # A retry of a chunk that is still being transcribed waits for the same result
+        task = self._pending.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # Detached so that one requester going away does not cancel the others
+            task = asyncio.get_running_loop().create_task(self._compute_and_store(key, compute, run_blocking))
+            self._pending[key] = task
+            task.add_done_callback(lambda done: self._finish_pending(key, done))
+        return await asyncio.shield(task)
+
+    async def _compute_and_store(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[CachedResult]],
+        run_blocking: Callable[..., Awaitable[Any]]
+    ) -> CachedResult:
+        result = None
+        if self.disk_dir:
+            result = await run_blocking(self._read_disk, key)
+            if result is not None:
+                self.disk_hits += 1
+
+        if result is None:
+            self.misses += 1
+            result = await compute()
+            if self.disk_dir:
+                await run_blocking(self._write_disk, key, result)
+
+        self._put_memory(key, result)
+        return result
+
+    def _finish_pending(self, key: str, task: asyncio.Task):
+        if self._pending.get(key) is task:
+            del self._pending[key]
+        if not task.cancelled():
+            # Mark retrieved so a failure nobody waited for does not log a warning
+            task.exception()
+
+    def _put_memory(self, key: str, result: CachedResult):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[CachedResult]:
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["text"], float(data["confidence"])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable STT cache entry {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, result: CachedResult):
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"text": result[0], "confidence": result[1]}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write STT cache entry {key}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.coalesced + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "disk_tier": self.disk_dir,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_rate": round((lookups - self.misses) / lookups, 3) if lookups else 0.0
+        }
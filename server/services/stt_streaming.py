@@ -0,0 +1,192 @@
+# services/stt_streaming.py - Incremental transcription of a continuous audio stream
+
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional
+
+import numpy as np
+
+from services.vad import EnergyVAD
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TranscriptSegment:
+    """Partial or final transcript of a span of the stream (seconds from stream start)"""
+    kind: str
+    text: str
+    start: float
+    end: float
+    stable_text: str = ""
+    processing_time: float = 0.0
+
+    def to_message(self) -> dict:
+        message = {
+            "type": self.kind,
+            "text": self.text,
+            "start": round(self.start, 2),
+            "end": round(self.end, 2)
+        }
+        if self.kind == "partial":
+            message["stable_text"] = self.stable_text
+        return message
+
+
+def _common_word_prefix(previous: List[str], current: List[str]) -> List[str]:
+    prefix = []
+    for old, new in zip(previous, current):
+        if old != new:
+            break
+        prefix.append(new)
+    return prefix
+
+
+@dataclass
+class _SegmentBuffer:
+    """Audio of the open segment, appended to without re-copying on every frame"""
+    chunks: List[np.ndarray] = field(default_factory=list)
+    length: int = 0
+
+    def append(self, samples: np.ndarray):
+        self.chunks.append(samples)
+        self.length += len(samples)
+
+    def view(self) -> np.ndarray:
+        if len(self.chunks) > 1:
+            self.chunks = [np.concatenate(self.chunks)]
+        return self.chunks[0] if self.chunks else np.zeros(0, dtype=np.float32)
+
+    def drop(self, num_samples: int):
+        remaining = self.view()[num_samples:]
+        self.chunks = [remaining] if len(remaining) else []
+        self.length = len(remaining)
+
+
+class StreamingTranscriber:
+    """
+    Rolling-window transcription of one participant's audio stream
+
+    The open segment is re-transcribed every partial interval and emitted as a
+    partial; words unchanged since the previous partial are reported as stable.
+    The segment is finalized once speech is followed by enough silence (or it
+    reaches the maximum length), and the next segment starts after it.
+    """
+
+    def __init__(
+        self,
+        transcribe: Callable[[np.ndarray], Awaitable[str]],
+        sample_rate: int = 16000,
+        partial_interval_ms: Optional[int] = None,
+        endpoint_silence_ms: Optional[int] = None,
+        max_segment_s: Optional[float] = None
+    ):
+        self.transcribe = transcribe
+        self.sample_rate = sample_rate
+        self.partial_interval = int(sample_rate * (partial_interval_ms if partial_interval_ms is not None else int(
+            os.getenv("STT_STREAM_PARTIAL_MS", "300")
+        )) / 1000)
+        self.endpoint_silence = int(sample_rate * (endpoint_silence_ms if endpoint_silence_ms is not None else int(
+            os.getenv("STT_STREAM_ENDPOINT_MS", "500")
+        )) / 1000)
+        self.max_segment = int(sample_rate * (max_segment_s if max_segment_s is not None else float(
+            os.getenv("STT_STREAM_MAX_SEGMENT_S", "15")
+        )))
+        # Per-stream detector so the noise floor adapts to this participant
+        self.vad = EnergyVAD(sample_rate=sample_rate)
+
+        self._buffer = _SegmentBuffer()
+        self._segment_start = 0     # Stream offset (samples) of the open segment
+        self._partial_mark = 0      # Segment length at the last partial
+        self._partial_words: List[str] = []
+
+        self.partials_emitted = 0
+        self.finals_emitted = 0
+
+    @property
+    def buffered_seconds(self) -> float:
+        return self._buffer.length / self.sample_rate
+
+    def append(self, samples: np.ndarray):
+        """Add decoded 16 kHz mono samples to the open segment"""
+        if len(samples):
+            self._buffer.append(samples)
+
+    async def step(self) -> List[TranscriptSegment]:
+        """Emit a partial or final for the audio received so far, if enough is new"""
+        if self._buffer.length - self._partial_mark < self.partial_interval:
+            return []
+
+        audio = self._buffer.view()
+        self._partial_mark = len(audio)
+
+        speech = self.vad.detect(audio)
+        if not speech.has_speech:
+            # Only silence so far: keep a short lead-in and forget the rest
+            excess = len(audio) - self.endpoint_silence
+            if excess > 0:
+                self._advance(excess)
+                self._partial_mark = self._buffer.length
+            return []
+
+        trailing_silence = len(audio) - speech.end
+        if trailing_silence >= self.endpoint_silence:
+            return await self._finalize(speech.end)
+        if len(audio) >= self.max_segment:
+            return await self._finalize(len(audio))
+
+        started = time.perf_counter()
+        text = await self.transcribe(audio)
+        words = text.split()
+        stable = _common_word_prefix(self._partial_words, words)
+        self._partial_words = words
+        self.partials_emitted += 1
+        return [TranscriptSegment(
+            kind="partial",
+            text=text,
+            start=self._segment_start / self.sample_rate,
+            end=(self._segment_start + len(audio)) / self.sample_rate,
+            stable_text=" ".join(stable),
+            processing_time=(time.perf_counter() - started) * 1000
+        )]
+
+    async def flush(self) -> List[TranscriptSegment]:
+        """Finalize whatever speech remains when the stream ends"""
+        audio = self._buffer.view()
+        if len(audio) == 0:
+            return []
+        speech = self.vad.detect(audio)
+        if not speech.has_speech:
+            self._advance(len(audio))
+            return []
+        return await self._finalize(speech.end)
+
+    async def _finalize(self, end: int) -> List[TranscriptSegment]:
+        audio = self._buffer.view()
+        start_seconds = self._segment_start / self.sample_rate
+
+        started = time.perf_counter()
+        text = (await self.transcribe(audio[:end])).strip()
+        processing_time = (time.perf_counter() - started) * 1000
+
+        self._advance(end)
+        if not text:
+            return []
+
+        self.finals_emitted += 1
+        return [TranscriptSegment(
+            kind="final",
+            text=text,
+            start=start_seconds,
+            end=start_seconds + end / self.sample_rate,
+            processing_time=processing_time
+        )]
+
+    def _advance(self, num_samples: int):
+        """Close the segment up to num_samples; the remainder opens the next one"""
+        self._buffer.drop(num_samples)
+        self._segment_start += num_samples
+        self._partial_mark = 0
+        self._partial_words = []
@@ -0,0 +1,518 @@
+# services/stt_worker_pool.py - Dedicated STT inference worker processes
+#
+# Run the inference server next to the API:
+#     python -m services.stt_worker_pool
+# and start the API with STT_MODE=workers so routes talk to it over local IPC.
+# Both sides need the same secret STT_SERVER_AUTHKEY: the manager protocol
+# unpickles what it receives, so the key is all that guards the server.
+
+import asyncio
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.managers import BaseManager
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.speech_to_text import IndonesianSTTService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SERVER_ADDRESS = "127.0.0.1:50055"
+
+
+class _STTManager(BaseManager):
+    """IPC manager exposing the inference server queues"""
+    pass
+
+
+def _require_authkey() -> bytes:
+    """The shared IPC secret; there is deliberately no default"""
+    authkey = os.getenv("STT_SERVER_AUTHKEY", "")
+    if not authkey:
+        raise RuntimeError(
+            "STT_SERVER_AUTHKEY must be set to the same random secret for the STT inference "
+            "server and the API (e.g. python -c 'import secrets; print(secrets.token_hex(32))')"
+        )
+    return authkey.encode()
+
+
+def _parse_address(address: str) -> Tuple[str, int]:
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+def _parse_cpu_list(spec: str) -> List[int]:
+    """Parse a CPU list such as '0-3,6' into [0, 1, 2, 3, 6]"""
+    cpus = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.extend(range(int(first), int(last) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def plan_worker_cpus(num_workers: int) -> List[List[int]]:
+    """
+    Decide which CPUs each worker is pinned to
+
+    STT_WORKER_CPUS gives one CPU list per worker separated by ';' (e.g. '2-3;4-5').
+    Otherwise the first STT_API_RESERVED_CPUS cores are left to the API and the
+    rest are split evenly between workers. An empty list means no pinning.
+    """
+    spec = os.getenv("STT_WORKER_CPUS", "").strip()
+    if spec:
+        cpu_sets = [_parse_cpu_list(part) for part in spec.split(";")]
+        return [cpu_sets[i % len(cpu_sets)] for i in range(num_workers)]
+
+    if hasattr(os, "sched_getaffinity"):
+        available = sorted(os.sched_getaffinity(0))
+    else:
+        available = list(range(os.cpu_count() or 1))
+
+    reserved = int(os.getenv("STT_API_RESERVED_CPUS", "1"))
+    remaining = available[reserved:]
+    if len(remaining) < num_workers:
+        return [[] for _ in range(num_workers)]
+
+    per_worker = len(remaining) // num_workers
+    return [remaining[i * per_worker:(i + 1) * per_worker] for i in range(num_workers)]
+
+
+def _pin_to_cpus(cpus: List[int]):
+    """Pin the current process to the given CPUs where the OS supports it"""
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+
+def _worker_main(worker_id: int, cpus: List[int], request_queue, result_queue, max_batch_size: int):
+    """Inference worker: load the model once, then serve batches from the request queue"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    _pin_to_cpus(cpus)
+
+    # One inference thread per worker, using every pinned core for torch
+    os.environ["STT_WORKER_THREADS"] = "1"
+    if cpus:
+        os.environ["STT_TORCH_THREADS"] = str(len(cpus))
+
+    service = IndonesianSTTService()
+    service._load_model()
+    result_queue.put(("ready", worker_id, os.getpid(), None, None))
+    logger.info(f"STT worker {worker_id} ready (pid={os.getpid()}, cpus={cpus or 'all'})")
+
+    stopping = False
+    while not stopping:
+        job = request_queue.get()
+        if job is None:
+            break
+
+        # Drain whatever else is already waiting into the same forward pass
+        jobs = [job]
+        while len(jobs) < max_batch_size:
+            try:
+                job = request_queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                stopping = True
+                break
+            jobs.append(job)
+
+        _process_jobs(service, jobs, result_queue)
+
+    logger.info(f"STT worker {worker_id} stopped")
+
+
+def _process_jobs(service: IndonesianSTTService, jobs: List[tuple], result_queue):
+    """Run one batch of shared-memory jobs and post the results"""
+    segments = []
+    arrays = []
+    attached: List[int] = []  # Indexes of the jobs whose audio could be mapped
+    texts: List[Optional[str]] = [None] * len(jobs)
+    errors: List[Optional[str]] = [None] * len(jobs)
+
+    try:
+        for index, (_, _, shm_name, num_samples) in enumerate(jobs):
+            try:
+                shm = shared_memory.SharedMemory(name=shm_name)
+            except Exception as e:
+                # E.g. the client timed out and already unlinked it; only this job fails
+                logger.warning(f"STT worker could not attach {shm_name}: {e}")
+                errors[index] = str(e)
+                continue
+            # The client owns the segment; keep this process from unlinking it at exit
+            resource_tracker.unregister(shm._name, "shared_memory")
+            segments.append(shm)
+            arrays.append(np.ndarray((num_samples,), dtype=np.float32, buffer=shm.buf))
+            attached.append(index)
+
+        if arrays:
+            try:
+                for index, text in zip(attached, service._run_batch_inference_sync(arrays)):
+                    texts[index] = text
+            except Exception as e:
+                logger.error(f"STT worker batch error: {e}")
+                for index in attached:
+                    errors[index] = str(e)
+    finally:
+        # Views must be released before the segments can be closed
+        del arrays
+        for shm in segments:
+            shm.close()
+
+    for (client_id, job_id, _, _), text, error in zip(jobs, texts, errors):
+        result_queue.put(("result", client_id, job_id, text, error))
+
+
+class STTInferenceServer:
+    """Long-lived pool of inference processes behind a local IPC manager"""
+
+    def __init__(self, address: Optional[str] = None, num_workers: Optional[int] = None):
+        self.address = _parse_address(address or os.getenv("STT_SERVER_ADDRESS", DEFAULT_SERVER_ADDRESS))
+        self.authkey = _require_authkey()
+        self.num_workers = num_workers or int(os.getenv("STT_WORKER_PROCESSES", "2"))
+        self.max_batch_size = int(os.getenv("STT_MAX_BATCH_SIZE", "8"))
+        self.cpu_plan = plan_worker_cpus(self.num_workers)
+
+        self._ctx = mp.get_context("spawn")
+        self.request_queue = self._ctx.Queue()
+        self.result_queue = self._ctx.Queue()
+        self._client_queues: Dict[str, queue.Queue] = {}
+        self._processes: Dict[int, mp.Process] = {}
+        self._ready: Dict[int, int] = {}
+        self._restarts = 0
+        self._stopping = threading.Event()
+
+    def _start_worker(self, worker_id: int):
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.cpu_plan[worker_id], self.request_queue, self.result_queue, self.max_batch_size),
+            name=f"stt-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        self._processes[worker_id] = process
+        self._ready.pop(worker_id, None)
+
+    def _get_client_queue(self, client_id: str) -> queue.Queue:
+        return self._client_queues.setdefault(client_id, queue.Queue())
+
+    def _release_client_queue(self, client_id: str):
+        """Forget a client that disconnected cleanly"""
+        self._client_queues.pop(client_id, None)
+
+    def _prune_clients(self):
+        """Drop the queues of clients on this host whose process has exited without releasing them"""
+        hostname = socket.gethostname()
+        for client_id in list(self._client_queues):
+            host, _, rest = client_id.rpartition("-")[0].rpartition("-")
+            if host != hostname or not rest.isdigit():
+                continue
+            try:
+                os.kill(int(rest), 0)
+            except ProcessLookupError:
+                logger.info(f"Dropping result queue of exited client {client_id}")
+                self._client_queues.pop(client_id, None)
+            except OSError:
+                pass
+
+    def _route_results(self):
+        """Forward worker results to client queues and restart dead workers"""
+        while not self._stopping.is_set():
+            try:
+                kind, target, job_id_or_pid, text, error = self.result_queue.get(timeout=1)
+            except queue.Empty:
+                for worker_id, process in list(self._processes.items()):
+                    if not process.is_alive():
+                        logger.warning(f"STT worker {worker_id} exited ({process.exitcode}), restarting")
+                        self._restarts += 1
+                        self._start_worker(worker_id)
+                self._prune_clients()
+                continue
+
+            if kind == "ready":
+                self._ready[target] = job_id_or_pid
+            else:
+                # Results for a client that has gone away are dropped rather than queued forever
+                client_queue = self._client_queues.get(target)
+                if client_queue is not None:
+                    client_queue.put(("result", job_id_or_pid, text, error))
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "address": f"{self.address[0]}:{self.address[1]}",
+            "workers": [
+                {
+                    "worker_id": worker_id,
+                    "pid": process.pid,
+                    "alive": process.is_alive(),
+                    "ready": worker_id in self._ready,
+                    "cpus": self.cpu_plan[worker_id]
+                }
+                for worker_id, process in self._processes.items()
+            ],
+            "restarts": self._restarts,
+            "connected_clients": len(self._client_queues)
+        }
+
+    def serve_forever(self):
+        """Start the workers and serve IPC requests until interrupted"""
+        for worker_id in range(self.num_workers):
+            self._start_worker(worker_id)
+
+        threading.Thread(target=self._route_results, name="stt-result-router", daemon=True).start()
+
+        _STTManager.register("get_request_queue", callable=lambda: self.request_queue)
+        _STTManager.register("get_result_queue", callable=self._get_client_queue)
+        _STTManager.register("release_result_queue", callable=self._release_client_queue)
+        _STTManager.register("get_status", callable=self.get_status)
+
+        manager = _STTManager(address=self.address, authkey=self.authkey)
+        server = manager.get_server()
+        logger.info(f"STT inference server listening on {self.address[0]}:{self.address[1]} "
+                    f"with {self.num_workers} workers")
+        try:
+            server.serve_forever()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        self._stopping.set()
+        for _ in self._processes:
+            self.request_queue.put(None)
+        for process in self._processes.values():
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        logger.info("STT inference server stopped")
+
+
+class STTWorkerPool:
+    """Thin client that sends decoded audio to the inference server through shared memory"""
+
+    def __init__(self):
+        self.address = _parse_address(os.getenv("STT_SERVER_ADDRESS", DEFAULT_SERVER_ADDRESS))
+        self.authkey = _require_authkey()
+        self.timeout = float(os.getenv("STT_WORKER_TIMEOUT", "60"))
+        self.client_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        # Used only for decoding and preprocessing; the model is never loaded here
+        self._frontend = IndonesianSTTService()
+        self.model_name = self._frontend.model_name
+        self.model_version = self._frontend.model_version
+
+        self._manager: Optional[_STTManager] = None
+        self._requests = None
+        self._results = None
+        self._connect_lock = threading.Lock()
+        self._pending: Dict[int, Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._job_ids = itertools.count()
+
+        self._completed = 0
+        self._failed = 0
+        self._total_latency_ms = 0.0
+
+    async def initialize(self):
+        """Connect to the inference server"""
+        # Keep API traffic off the cores reserved for inference workers
+        api_cpus = os.getenv("STT_API_CPUS", "").strip()
+        if api_cpus:
+            _pin_to_cpus(_parse_cpu_list(api_cpus))
+
+        await self._frontend._run_in_executor(self._connect)
+
+    def _connect(self):
+        with self._connect_lock:
+            if self._manager is not None:
+                return
+
+            _STTManager.register("get_request_queue")
+            _STTManager.register("get_result_queue")
+            _STTManager.register("release_result_queue")
+            _STTManager.register("get_status")
+
+            manager = _STTManager(address=self.address, authkey=self.authkey)
+            manager.connect()
+            self._requests = manager.get_request_queue()
+            self._results = manager.get_result_queue(self.client_id)
+            self._manager = manager
+
+            threading.Thread(target=self._listen, name="stt-ipc-listener", daemon=True).start()
+            logger.info(f"Connected to STT inference server at {self.address[0]}:{self.address[1]}")
+
+    def _listen(self):
+        """Resolve pending requests as results arrive from the server"""
+        results = self._results
+        while True:
+            try:
+                message = results.get()
+            except (EOFError, OSError) as e:
+                logger.error(f"Lost connection to STT inference server: {e}")
+                self._manager = None
+                # Their results will never arrive; fail them now instead of at the timeout
+                error = ConnectionError(f"Lost connection to STT inference server: {e}")
+                for job_id in list(self._pending):
+                    entry = self._pending.pop(job_id, None)
+                    if entry:
+                        loop, future = entry
+                        loop.call_soon_threadsafe(self._fail, future, error)
+                return
+
+            if message is None:
+                return
+
+            _, job_id, text, error = message
+            entry = self._pending.pop(job_id, None)
+            if entry:
+                loop, future = entry
+                loop.call_soon_threadsafe(self._resolve, future, text, error)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, text: Optional[str], error: Optional[str]):
+        if future.done():
+            return
+        if error:
+            future.set_exception(RuntimeError(f"STT worker error: {error}"))
+        else:
+            future.set_result(text)
+
+    @staticmethod
+    def _fail(future: asyncio.Future, error: Exception):
+        if not future.done():
+            future.set_exception(error)
+
+    async def transcribe_audio(self, audio_data: bytes, content_type: Optional[str] = None) -> Tuple[str, float, float]:
+        """
+        Transcribe audio data to text on the inference server
+
+        Returns:
+            Tuple of (transcribed_text, confidence_score, processing_time)
+        """
+        start_time = time.time()
+
+        cache = self._frontend.cache
+        transcription, confidence = await cache.get_or_compute(
+            cache.make_key(audio_data, content_type),
+            lambda: self._transcribe_remote(audio_data, content_type),
+            self._frontend._run_in_executor
+        )
+
+        processing_time = (time.time() - start_time) * 1000
+        self._completed += 1
+        self._total_latency_ms += processing_time
+
+        logger.info(f"Transcription completed in {processing_time:.2f}ms: {transcription[:50]}...")
+        return transcription, confidence, processing_time
+
+    async def _transcribe_remote(self, audio_data: bytes, content_type: Optional[str]) -> Tuple[str, float]:
+        """Decode locally and run the model on a worker, returning (text, confidence)"""
+        if self._manager is None:
+            await self.initialize()
+
+        audio_array = await self._frontend._run_in_executor(
+            self._frontend._prepare_audio, audio_data, content_type
+        )
+        if audio_array is None:
+            # Silent chunk, nothing to send to the workers
+            return "", 0.0
+
+        return await self.transcribe_array(audio_array), 0.85
+
+    async def transcribe_samples(self, audio_array: np.ndarray) -> Tuple[str, float, float]:
+        """Transcribe a decoded chunk of a stream on the inference server after VAD trimming"""
+        start_time = time.time()
+        frontend = self._frontend
+        audio_array, _ = frontend.vad.trim(audio_array) if frontend.vad_enabled else (audio_array, 0.0)
+        transcription = "" if audio_array is None else await self.transcribe_array(audio_array)
+        confidence = 0.85 if transcription else 0.0
+        return transcription, confidence, (time.time() - start_time) * 1000
+
+    async def transcribe_array(self, audio_array: np.ndarray) -> str:
+        """Run already decoded 16 kHz mono samples on a worker (no cache or VAD)"""
+        if self._manager is None:
+            await self.initialize()
+
+        audio_array = np.ascontiguousarray(audio_array, dtype=np.float32)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(1, audio_array.nbytes))
+        job_id = next(self._job_ids)
+        try:
+            np.ndarray(audio_array.shape, dtype=np.float32, buffer=shm.buf)[:] = audio_array
+
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[job_id] = (loop, future)
+
+            await self._frontend._run_in_executor(
+                self._requests.put, (self.client_id, job_id, shm.name, len(audio_array))
+            )
+            transcription = await asyncio.wait_for(future, self.timeout)
+        except Exception as e:
+            self._failed += 1
+            logger.error(f"Transcription error: {e}")
+            raise
+        finally:
+            self._pending.pop(job_id, None)
+            shm.close()
+            shm.unlink()
+
+        return transcription
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {
+            "mode": "workers",
+            "model_name": self.model_name,
+            "connected": self._manager is not None,
+            "pending": len(self._pending),
+            "completed": self._completed,
+            "failed": self._failed,
+            "average_latency_ms": round(self._total_latency_ms / self._completed, 2) if self._completed else 0.0,
+            "cache": self._frontend.cache.get_stats(),
+            "vad": self._frontend.vad.get_stats() if self._frontend.vad_enabled else {"enabled": False}
+        }
+        if self._manager is not None:
+            try:
+                stats["server"] = self._manager.get_status()._getvalue()
+            except Exception as e:
+                stats["server_error"] = str(e)
+        return stats
+
+    def shutdown(self):
+        if self._results is not None:
+            try:
+                self._results.put(None)
+            except Exception:
+                pass
+        if self._manager is not None:
+            try:
+                self._manager.release_result_queue(self.client_id)
+            except Exception:
+                pass
+        self._frontend.shutdown()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    STTInferenceServer().serve_forever()
@@ -1,23 +1,41 @@
 import asyncio
 import json
-from typing import List, Dict, Any
+import os
+import time
+from typing import List, Dict, Any, Callable, Optional, Tuple
 import logging
 from datetime import datetime
 import openai
 from openai import AsyncOpenAI
 
+from services.llm_cache import LLMResponseCache, get_llm_cache
+
 logger = logging.getLogger(__name__)
 
+# Bump when prompts or response handling change so cached answers are not reused
+PROMPT_VERSION = "3"
+
 class ConversationSummarizationService:
-    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo"):
+    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo", mode: Optional[str] = None, cache: Optional[LLMResponseCache] = None):
         self.client = AsyncOpenAI(api_key=api_key)
         self.model = model
+        self.cache = cache or get_llm_cache()
+        # structured: one JSON call for summary, key points and action items
+        # concurrent: the three prompts issued in parallel
+        self.mode = (mode or os.getenv("SUMMARY_MODE", "structured")).lower()
+        if self.mode not in ("structured", "concurrent"):
+            raise ValueError(f"Unknown SUMMARY_MODE '{self.mode}', expected 'structured' or 'concurrent'")
+        # Transcripts longer than this many tokens are summarized map-reduce style
+        self.chunk_tokens = max(1000, int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000")))
+        self.map_concurrency = max(1, int(os.getenv("SUMMARY_MAP_CONCURRENCY", "4")))
+        self._encoding = self._load_encoding(model)
         
     async def summarize_conversation(
         self, 
         transcriptions: List[Dict[str, Any]], 
         conversation_duration: int,
-        language: str = "indonesian"
+        language: str = "indonesian",
+        rolling_summary: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Summarize conversation from transcriptions
@@ -26,42 +44,66 @@ class ConversationSummarizationService:
             transcriptions: List of transcription records
             conversation_duration: Duration in seconds
             language: Language for summary
+            rolling_summary: Running summary kept during the conversation; when
+                given, only transcriptions not marked rolling_folded are read
+                again and merged with it
             
         Returns:
-            Dictionary containing summary, key points, and action items
+            Dictionary containing summary, key points, and action items, plus
+            processing_time (ms) and per-call timings
         """
         try:
-            logger.info(f"Starting summarization for {len(transcriptions)} transcriptions")
+            logger.info(f"Starting summarization for {len(transcriptions)} transcriptions ({self.mode})")
+            started = time.perf_counter()
+            timings: Dict[str, int] = {}
             
             # Prepare conversation text
-            conversation_text = self._prepare_conversation_text(transcriptions)
-            
-            # Generate summary
-            summary_response = await self._generate_summary(conversation_text, language)
+            conversation_lines = self._prepare_conversation_lines(transcriptions)
+            conversation_text = "\n".join(line for _, line in conversation_lines)
             
-            # Extract key points
-            key_points = await self._extract_key_points(conversation_text, language)
+            if rolling_summary:
+                # Only the rows since the last fold still need reading
+                tail = [t for t in transcriptions if not t.get("rolling_folded")]
+                final_text, chunk_count = await self._fit_to_budget(self._prepare_conversation_lines(tail), language, timings)
+                final_text = self._rolling_notes_text(rolling_summary, final_text)
+            else:
+                # Long transcripts are condensed to notes that fit one request
+                final_text, chunk_count = await self._fit_to_budget(conversation_lines, language, timings)
             
-            # Extract action items
-            action_items = await self._extract_action_items(conversation_text, language)
+            sections = None
+            if self.mode == "structured":
+                sections = await self._timed(timings, "structured", self._generate_structured(final_text, language))
+            if sections is None:
+                # Each prompt re-sends the transcript, so at least pay for them in parallel
+                summary_response, key_points, action_items = await asyncio.gather(
+                    self._timed(timings, "summary", self._generate_summary(final_text, language)),
+                    self._timed(timings, "key_points", self._extract_key_points(final_text, language)),
+                    self._timed(timings, "action_items", self._extract_action_items(final_text, language))
+                )
+            else:
+                summary_response, key_points, action_items = sections
             
             # Analyze participant contributions
             participants_analysis = await self._analyze_participants(transcriptions, language)
             
+            processing_time = int((time.perf_counter() - started) * 1000)
             result = {
                 "summary": summary_response,
-                "key_points": key_points,
-                "action_items": action_items,
+                "key_points": key_points or [],
+                "action_items": action_items or [],
                 "participants_analysis": participants_analysis,
                 "statistics": {
                     "total_duration": conversation_duration,
                     "total_transcriptions": len(transcriptions),
                     "total_words": len(conversation_text.split()),
-                    "participants_count": len(set(t["participant_name"] for t in transcriptions))
-                }
+                    "participants_count": len(set(t["participant_name"] for t in transcriptions)),
+                    "summary_chunks": chunk_count
+                },
+                "processing_time": processing_time,
+                "timings": timings
             }
             
-            logger.info("Conversation summarization completed successfully")
+            logger.info(f"Conversation summarization completed in {processing_time}ms {timings}")
             return result
             
         except Exception as e:
@@ -70,6 +112,10 @@ class ConversationSummarizationService:
     
     def _prepare_conversation_text(self, transcriptions: List[Dict[str, Any]]) -> str:
         """Prepare conversation text from transcriptions"""
+        return "\n".join(line for _, line in self._prepare_conversation_lines(transcriptions))
+    
+    def _prepare_conversation_lines(self, transcriptions: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        """(participant, formatted line) per transcription, in conversation order"""
         sorted_transcriptions = sorted(transcriptions, key=lambda x: x.get("timestamp", ""))
         
         conversation_parts = []
@@ -83,17 +129,212 @@ class ConversationSummarizationService:
             seconds = timestamp % 60
             time_str = f"[{minutes:02d}:{seconds:02d}]"
             
-            conversation_parts.append(f"{time_str} {participant}: {text}")
+            conversation_parts.append((participant, f"{time_str} {participant}: {text}"))
         
-        return "\n".join(conversation_parts)
+        return conversation_parts
+    
+    @staticmethod
+    def _load_encoding(model: str):
+        """tiktoken encoding for the model when tiktoken is installed, else None"""
+        try:
+            import tiktoken
+        except ImportError:
+            return None
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    
+    def count_tokens(self, text: str) -> int:
+        """Prompt size in tokens (estimated at ~4 characters per token without tiktoken)"""
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return len(text) // 4 + 1
+    
+    def _chunk_transcript(self, lines: List[Tuple[str, str]], budget: int) -> List[str]:
+        """Pack the transcript into chunks of at most budget tokens, cutting between speaker turns"""
+        # Consecutive lines by the same speaker form one turn
+        turns: List[List[str]] = []
+        previous = None
+        for participant, line in lines:
+            if participant != previous or not turns:
+                turns.append([])
+                previous = participant
+            turns[-1].append(line)
+        
+        pieces = []
+        for turn in turns:
+            text = "\n".join(turn)
+            if self.count_tokens(text) <= budget:
+                pieces.append(text)
+                continue
+            # A monologue longer than a chunk is cut between its lines (or words, as a last resort)
+            for line in turn:
+                if self.count_tokens(line) <= budget:
+                    pieces.append(line)
+                else:
+                    pieces.extend(self._pack(line.split(" "), budget, separator=" "))
+        return self._pack(pieces, budget)
+    
+    def _pack(self, pieces: List[str], budget: int, separator: str = "\n") -> List[str]:
+        """Greedily join consecutive pieces into groups of at most budget tokens"""
+        groups, current, current_tokens = [], [], 0
+        for piece in pieces:
+            tokens = self.count_tokens(piece)
+            if current and current_tokens + tokens > budget:
+                groups.append(separator.join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += tokens
+        if current:
+            groups.append(separator.join(current))
+        return groups
+    
+    async def _fit_to_budget(self, lines: List[Tuple[str, str]], language: str, timings: Dict[str, int]) -> Tuple[str, int]:
+        """The transcript itself when it fits one request, else its map-reduced notes; also the chunk count"""
+        text = "\n".join(line for _, line in lines)
+        if self.count_tokens(text) <= self.chunk_tokens:
+            return text, 1
+        chunks = self._chunk_transcript(lines, self.chunk_tokens)
+        return await self._map_reduce(chunks, language, timings), len(chunks)
+    
+    @staticmethod
+    def _rolling_notes_text(rolling_summary: str, segment: str) -> str:
+        if not segment:
+            return f"Notes on the conversation:\n{rolling_summary}"
+        return f"Notes on the conversation so far:\n{rolling_summary}\n\nRest of the conversation:\n{segment}"
+    
+    async def fold_summary(self, rolling_summary: Optional[str], transcriptions: List[Dict[str, Any]], language: str = "indonesian") -> str:
+        """Fold a new stretch of an ongoing conversation into its running summary"""
+        segment, _ = await self._fit_to_budget(self._prepare_conversation_lines(transcriptions), language, {})
+        text = self._rolling_notes_text(rolling_summary, segment) if rolling_summary else segment
+        
+        try:
+            return await self._chat(
+                messages=[
+                    {"role": "system", "content": self._get_rolling_prompt(language)},
+                    {"role": "user", "content": text}
+                ],
+                max_tokens=500,
+                temperature=0.2
+            )
+            
+        except Exception as e:
+            logger.error(f"Rolling summary error: {e}")
+            raise
+    
+    async def _map_reduce(self, chunks: List[str], language: str, timings: Dict[str, int]) -> str:
+        """Condense chunks to notes in parallel, then merge the notes level by level until they fit one request"""
+        semaphore = asyncio.Semaphore(self.map_concurrency)
+        
+        async def condense(text: str, merge: bool) -> str:
+            async with semaphore:
+                return await self._condense(text, language, merge)
+        
+        notes = await self._timed(timings, "map", asyncio.gather(*[condense(chunk, False) for chunk in chunks]))
+        logger.info(f"Condensed {len(chunks)} transcript chunks")
+        
+        level = 0
+        while len(notes) > 1 and self.count_tokens("\n\n".join(notes)) > self.chunk_tokens:
+            level += 1
+            groups = self._pack(notes, self.chunk_tokens, separator="\n\n")
+            if len(groups) == len(notes):
+                # No two notes fit together; merging cannot shrink the input any further
+                break
+            notes = await self._timed(timings, f"reduce_{level}", asyncio.gather(*[condense(group, True) for group in groups]))
+        
+        return "\n\n".join(f"[Part {i}/{len(notes)}]\n{note}" for i, note in enumerate(notes, 1))
+    
+    async def _condense(self, text: str, language: str, merge: bool) -> str:
+        """Notes on one part of a long conversation (or on several consecutive notes when merging)"""
+        prompt = self._get_merge_prompt(language) if merge else self._get_chunk_prompt(language)
+        
+        try:
+            return await self._chat(
+                messages=[
+                    {"role": "system", "content": prompt},
+                    {"role": "user", "content": text}
+                ],
+                max_tokens=400,
+                temperature=0.2
+            )
+            
+        except Exception as e:
+            # A missing part would silently drop content from the summary, so fail the whole run
+            logger.error(f"Chunk {'merge' if merge else 'summary'} error: {e}")
+            raise
+    
+    async def _chat(self, messages: List[Dict[str, str]], validate: Optional[Callable[[str], Any]] = None, **params) -> str:
+        """One chat completion, answered from the response cache when the same request was made before
+        
+        validate raises on a completion the caller cannot use, keeping it out of the cache.
+        """
+        async def complete():
+            response = await self.client.chat.completions.create(model=self.model, messages=messages, **params)
+            usage = response.usage
+            return (
+                response.choices[0].message.content.strip(),
+                usage.prompt_tokens if usage else 0,
+                usage.completion_tokens if usage else 0
+            )
+        
+        key = self.cache.make_key("openai", self.model, PROMPT_VERSION, params, messages)
+        return await self.cache.get_or_compute(key, complete, validate)
+    
+    @staticmethod
+    async def _timed(timings: Dict[str, int], name: str, call):
+        """Await an LLM call, recording its wall time in ms under name"""
+        started = time.perf_counter()
+        try:
+            return await call
+        finally:
+            timings[name] = int((time.perf_counter() - started) * 1000)
+    
+    async def _generate_structured(self, conversation_text: str, language: str) -> Optional[tuple]:
+        """Summary, key points and action items from one JSON call; None to fall back to separate prompts"""
+        prompt = self._get_structured_prompt(language)
+        
+        try:
+            content = await self._chat(
+                messages=[
+                    {"role": "system", "content": prompt},
+                    {"role": "user", "content": f"Conversation to summarize:\n\n{conversation_text}"}
+                ],
+                max_tokens=1000,
+                temperature=0.2,
+                response_format={"type": "json_object"},
+                validate=self._parse_structured
+            )
+            return self._parse_structured(content)
+            
+        except Exception as e:
+            logger.warning(f"Structured summary failed, falling back to separate prompts: {e}")
+            return None
+    
+    @staticmethod
+    def _parse_structured(content: str) -> tuple:
+        """Summary, key points and action items from the JSON answer; raises when a section is missing"""
+        data = json.loads(content)
+        if not isinstance(data, dict):
+            raise ValueError("structured summary is not a JSON object")
+        summary = data.get("summary")
+        key_points = data.get("key_points")
+        action_items = data.get("action_items")
+        if not isinstance(summary, str) or not isinstance(key_points, list) or not isinstance(action_items, list):
+            raise ValueError("missing summary, key_points or action_items")
+        
+        action_items = [
+            item if isinstance(item, dict) else {"task": str(item), "assignee": "TBD", "priority": "medium"}
+            for item in action_items
+        ]
+        return summary.strip(), [str(point) for point in key_points], action_items
     
     async def _generate_summary(self, conversation_text: str, language: str) -> str:
         """Generate conversation summary"""
         prompt = self._get_summary_prompt(language)
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
+            return await self._chat(
                 messages=[
                     {"role": "system", "content": prompt},
                     {"role": "user", "content": f"Conversation to summarize:\n\n{conversation_text}"}
@@ -102,8 +343,6 @@ class ConversationSummarizationService:
                 temperature=0.3
             )
             
-            return response.choices[0].message.content.strip()
-            
         except Exception as e:
             logger.error(f"Summary generation error: {e}")
             return "Error generating summary"
@@ -113,8 +352,7 @@ class ConversationSummarizationService:
         prompt = self._get_key_points_prompt(language)
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
+            content = await self._chat(
                 messages=[
                     {"role": "system", "content": prompt},
                     {"role": "user", "content": f"Extract key points from:\n\n{conversation_text}"}
@@ -123,8 +361,6 @@ class ConversationSummarizationService:
                 temperature=0.2
             )
             
-            # Parse response as JSON list or split by lines
-            content = response.choices[0].message.content.strip()
             try:
                 key_points = json.loads(content)
                 if isinstance(key_points, list):
@@ -142,8 +378,7 @@ class ConversationSummarizationService:
         prompt = self._get_action_items_prompt(language)
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
+            content = await self._chat(
                 messages=[
                     {"role": "system", "content": prompt},
                     {"role": "user", "content": f"Extract action items from:\n\n{conversation_text}"}
@@ -152,7 +387,6 @@ class ConversationSummarizationService:
                 temperature=0.2
             )
             
-            content = response.choices[0].message.content.strip()
             try:
                 action_items = json.loads(content)
                 if isinstance(action_items, list):
@@ -207,6 +441,63 @@ class ConversationSummarizationService:
             Focus on main points, important decisions, and conclusions reached.
             Keep the summary under 200 words."""
     
+    def _get_structured_prompt(self, language: str) -> str:
+        """Get prompt for the combined summary / key points / action items call"""
+        if language.lower() == "indonesian":
+            return """Anda adalah asisten AI yang bertugas menganalisis percakapan dalam bahasa Indonesia.
+            Jawab hanya dengan objek JSON dengan struktur:
+            {"summary": "ringkasan percakapan, tidak lebih dari 200 kata",
+             "key_points": ["Poin 1", "Poin 2"],
+             "action_items": [{"task": "deskripsi tugas", "assignee": "nama/TBD", "priority": "high/medium/low"}]}
+            Ringkasan fokus pada poin-poin utama, keputusan penting, dan kesimpulan.
+            key_points berisi maksimal 5 poin utama. action_items hanya berisi tugas yang jelas
+            dan dapat ditindaklanjuti (boleh kosong). Semua teks dalam bahasa Indonesia."""
+        else:
+            return """You are an AI assistant tasked with analyzing conversations.
+            Answer only with a JSON object with structure:
+            {"summary": "summary of the conversation, under 200 words",
+             "key_points": ["Point 1", "Point 2"],
+             "action_items": [{"task": "task description", "assignee": "name/TBD", "priority": "high/medium/low"}]}
+            Focus the summary on main points, important decisions, and conclusions reached.
+            key_points holds at most 5 main points. action_items only includes clear and
+            actionable tasks (it may be empty)."""
+    
+    def _get_chunk_prompt(self, language: str) -> str:
+        """Get prompt for notes on one part of a long conversation"""
+        if language.lower() == "indonesian":
+            return """Berikut adalah satu bagian dari percakapan yang panjang.
+            Buat catatan ringkas dalam bahasa Indonesia tentang bagian ini: topik yang dibahas,
+            keputusan, poin penting, dan tugas yang disebutkan (beserta siapa yang bertanggung jawab).
+            Sebutkan nama peserta. Maksimal 150 kata."""
+        else:
+            return """The following is one part of a long conversation.
+            Write concise notes on this part: topics discussed, decisions, key points and any
+            tasks mentioned (with who is responsible). Name the participants. At most 150 words."""
+    
+    def _get_merge_prompt(self, language: str) -> str:
+        """Get prompt for merging notes on consecutive parts of a conversation"""
+        if language.lower() == "indonesian":
+            return """Berikut adalah catatan dari beberapa bagian percakapan yang berurutan.
+            Gabungkan menjadi satu catatan ringkas dalam bahasa Indonesia, pertahankan keputusan,
+            poin penting, dan tugas beserta penanggung jawabnya. Maksimal 200 kata."""
+        else:
+            return """The following are notes on consecutive parts of a conversation.
+            Merge them into one concise set of notes, keeping decisions, key points and tasks
+            with who is responsible. At most 200 words."""
+    
+    def _get_rolling_prompt(self, language: str) -> str:
+        """Get prompt for updating the running summary of an ongoing conversation"""
+        if language.lower() == "indonesian":
+            return """Anda memperbarui catatan berjalan dari percakapan yang masih berlangsung.
+            Gabungkan bagian baru percakapan ke dalam catatan sebelumnya (jika ada) dan tulis ulang
+            sebagai satu catatan ringkas dalam bahasa Indonesia: topik, keputusan, poin penting,
+            dan tugas beserta penanggung jawabnya, sesuai urutan waktu. Maksimal 300 kata."""
+        else:
+            return """You are updating the running notes of an ongoing conversation.
+            Fold the new part of the conversation into the previous notes (if any) and rewrite them
+            as one concise set of notes: topics, decisions, key points and tasks with who is
+            responsible, in chronological order. At most 300 words."""
+    
     def _get_key_points_prompt(self, language: str) -> str:
         """Get key points extraction prompt"""
         if language.lower() == "indonesian":
@@ -0,0 +1,209 @@
+# services/transcription_jobs.py - Persisted asynchronous transcription jobs
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.sql import func
+
+from database.models import JobStatus, Transcription, TranscriptionJob
+from services.blob_store import get_blob_store
+from services.job_queue import BackgroundJobQueue
+
+logger = logging.getLogger(__name__)
+
+# Audio larger than this is not kept on the Transcription row
+MAX_STORED_AUDIO_BYTES = 1024 * 1024
+
+
+class TranscriptionJobRunner:
+    """
+    Transcribe uploaded chunks in the background
+
+    submit() stores the chunk as a TranscriptionJob and returns at once; workers
+    claim jobs (an atomic PENDING -> RUNNING update, so only one process runs a
+    job), transcribe them and write the Transcription row. Jobs left behind by a
+    restart are picked up again by recover(), which also runs every
+    STT_JOB_SWEEP_S so jobs of a worker that died while others keep running
+    are retried once they go stale.
+    """
+
+    def __init__(self, stt_service, session_factory, concurrency: Optional[int] = None, stale_after_s: Optional[float] = None):
+        self.stt_service = stt_service
+        self.session_factory = session_factory
+        self.stale_after = timedelta(seconds=stale_after_s if stale_after_s is not None else float(
+            os.getenv("STT_JOB_STALE_S", "600")
+        ))
+        self.sweep_interval = float(os.getenv("STT_JOB_SWEEP_S", "60"))
+        self.queue = BackgroundJobQueue(
+            "stt-job",
+            self._run,
+            concurrency=concurrency or int(os.getenv("STT_JOB_WORKERS", "4"))
+        )
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.queue.start()
+        if self._sweeper is None:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_loop(), name="stt-job-sweep")
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+        await self.queue.stop()
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.recover()
+            except Exception as e:
+                logger.error(f"Transcription job sweep failed: {e}")
+
+    async def recover(self) -> int:
+        """Re-queue pending jobs and jobs whose worker died mid-run"""
+        stale_before = datetime.now(timezone.utc) - self.stale_after
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(TranscriptionJob)
+                .where(
+                    TranscriptionJob.status == JobStatus.RUNNING,
+                    TranscriptionJob.started_at < stale_before
+                )
+                .values(status=JobStatus.PENDING)
+            )
+            requeued_stale = result.rowcount
+            await db.commit()
+
+            result = await db.execute(
+                select(TranscriptionJob.id)
+                .where(TranscriptionJob.status == JobStatus.PENDING)
+                .order_by(TranscriptionJob.id)
+            )
+            job_ids = result.scalars().all()
+
+        # Jobs already queued in this process are not queued twice
+        queued = sum(self.queue.enqueue(job_pk) for job_pk in job_ids)
+        if queued:
+            logger.info(f"Recovered {queued} transcription jobs ({requeued_stale} stale)")
+        return queued
+
+    async def submit(
+        self,
+        db,
+        conversation_pk: int,
+        participant_identity: str,
+        participant_name: str,
+        start_time: int,
+        audio_data: bytes,
+        content_type: Optional[str],
+        audio_duration: int,
+        store_audio: bool = True,
+        submitted_by: Optional[int] = None
+    ) -> TranscriptionJob:
+        """Persist a chunk for background transcription and queue it"""
+        job = TranscriptionJob(
+            conversation_id=conversation_pk,
+            participant_identity=participant_identity,
+            participant_name=participant_name,
+            start_time=start_time,
+            audio_data=audio_data,
+            content_type=content_type,
+            audio_duration=audio_duration,
+            store_audio=store_audio,
+            submitted_by=submitted_by
+        )
+        db.add(job)
+        await db.commit()
+
+        self.queue.enqueue(job.id)
+        return job
+
+    async def wait(self, job_pk: int, timeout: float) -> bool:
+        """Wait for a job running in this process to finish"""
+        return await self.queue.wait(job_pk, timeout)
+
+    async def _run(self, job_pk: int):
+        # Claim the job; another process may already have taken it
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(TranscriptionJob)
+                .where(TranscriptionJob.id == job_pk, TranscriptionJob.status == JobStatus.PENDING)
+                .values(
+                    status=JobStatus.RUNNING,
+                    started_at=func.now(),
+                    attempts=TranscriptionJob.attempts + 1
+                )
+                .returning(
+                    TranscriptionJob.conversation_id,
+                    TranscriptionJob.participant_identity,
+                    TranscriptionJob.participant_name,
+                    TranscriptionJob.start_time,
+                    TranscriptionJob.audio_data,
+                    TranscriptionJob.content_type,
+                    TranscriptionJob.audio_duration,
+                    TranscriptionJob.store_audio
+                )
+            )
+            job = result.one_or_none()
+            await db.commit()
+        if job is None:
+            return
+
+        try:
+            transcribed_text, confidence, processing_time = await self.stt_service.transcribe_audio(
+                job.audio_data,
+                content_type=job.content_type
+            )
+        except Exception as e:
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(TranscriptionJob)
+                    .where(TranscriptionJob.id == job_pk)
+                    .values(status=JobStatus.FAILED, error=str(e)[:1000], completed_at=func.now())
+                )
+                await db.commit()
+            raise
+
+        async with self.session_factory() as db:
+            transcription_id = None
+            if transcribed_text.strip():
+                transcription = Transcription(
+                    conversation_id=job.conversation_id,
+                    participant_identity=job.participant_identity,
+                    participant_name=job.participant_name,
+                    transcribed_text=transcribed_text,
+                    confidence_score=str(confidence),
+                    start_time=job.start_time,
+                    end_time=job.start_time + job.audio_duration,
+                    audio_duration=job.audio_duration,
+                    processing_time=int(processing_time),
+                    model_version=self.stt_service.model_version
+                )
+                if job.store_audio and len(job.audio_data) < MAX_STORED_AUDIO_BYTES:
+                    transcription.audio_ref = await get_blob_store().put_async(job.audio_data)
+                    transcription.audio_content_type = job.content_type
+                db.add(transcription)
+                await db.flush()
+                transcription_id = transcription.id
+
+            # The row and the job outcome are committed together; the upload is dropped
+            await db.execute(
+                update(TranscriptionJob)
+                .where(TranscriptionJob.id == job_pk)
+                .values(
+                    status=JobStatus.COMPLETED,
+                    transcription_id=transcription_id,
+                    audio_data=None,
+                    completed_at=func.now()
+                )
+            )
+            await db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.queue.get_stats()
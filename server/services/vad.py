@@ -0,0 +1,123 @@
+# services/vad.py - Lightweight voice-activity detection for STT input
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VADResult:
+    """Speech region found in an audio array (sample indices)"""
+    start: int
+    end: int
+    speech_frames: int
+    total_frames: int
+
+    @property
+    def has_speech(self) -> bool:
+        return self.end > self.start
+
+
+class EnergyVAD:
+    """Frame energy + zero-crossing voice-activity detector, fully vectorized with NumPy"""
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        threshold_db: Optional[float] = None,
+        min_speech_ms: Optional[int] = None,
+        padding_ms: Optional[int] = None,
+        max_zero_crossing_rate: float = 0.35
+    ):
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.threshold_db = threshold_db if threshold_db is not None else float(
+            os.getenv("STT_VAD_THRESHOLD_DB", "-45")
+        )
+        self.min_speech_ms = min_speech_ms if min_speech_ms is not None else int(
+            os.getenv("STT_VAD_MIN_SPEECH_MS", "200")
+        )
+        self.padding_ms = padding_ms if padding_ms is not None else int(
+            os.getenv("STT_VAD_PADDING_MS", "200")
+        )
+        self.max_zero_crossing_rate = max_zero_crossing_rate
+
+        # Running totals for reporting
+        self.chunks_processed = 0
+        self.chunks_dropped = 0
+        self.seconds_processed = 0.0
+        self.seconds_skipped = 0.0
+
+    def detect(self, audio_array: np.ndarray) -> VADResult:
+        """Find the span between the first and last speech frame"""
+        num_frames = len(audio_array) // self.frame_length
+        if num_frames == 0:
+            return VADResult(0, 0, 0, 0)
+
+        frames = audio_array[:num_frames * self.frame_length].reshape(num_frames, self.frame_length)
+
+        # Per-frame energy in dBFS
+        energy = np.einsum("ij,ij->i", frames, frames, dtype=np.float64) / self.frame_length
+        energy_db = 10.0 * np.log10(energy + 1e-12)
+
+        # Per-frame zero-crossing rate
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame_length
+
+        # Adapt to the noise floor, but never above what the loudest frames allow
+        noise_floor = np.percentile(energy_db, 10)
+        peak = energy_db.max()
+        threshold = max(self.threshold_db, min(noise_floor + 10.0, peak - 15.0))
+
+        # Voiced frames are speech; hiss-like frames only when well above the floor
+        speech = (energy_db > threshold) & (
+            (zcr < self.max_zero_crossing_rate) | (energy_db > max(threshold, noise_floor) + 10.0)
+        )
+
+        speech_frames = int(np.count_nonzero(speech))
+        min_frames = max(1, int(self.min_speech_ms * self.sample_rate / 1000) // self.frame_length)
+        if speech_frames < min_frames:
+            return VADResult(0, 0, speech_frames, num_frames)
+
+        speech_idx = np.flatnonzero(speech)
+        padding = int(self.padding_ms * self.sample_rate / 1000)
+        start = max(0, int(speech_idx[0]) * self.frame_length - padding)
+        end = min(len(audio_array), (int(speech_idx[-1]) + 1) * self.frame_length + padding)
+        return VADResult(start, end, speech_frames, num_frames)
+
+    def trim(self, audio_array: np.ndarray) -> Tuple[Optional[np.ndarray], float]:
+        """
+        Trim leading/trailing silence
+
+        Returns:
+            Tuple of (trimmed view or None when the chunk is all silence, seconds skipped)
+        """
+        total_seconds = len(audio_array) / self.sample_rate
+        result = self.detect(audio_array)
+
+        self.chunks_processed += 1
+        self.seconds_processed += total_seconds
+
+        if not result.has_speech:
+            self.chunks_dropped += 1
+            self.seconds_skipped += total_seconds
+            return None, total_seconds
+
+        skipped = (len(audio_array) - (result.end - result.start)) / self.sample_rate
+        self.seconds_skipped += skipped
+        return audio_array[result.start:result.end], skipped
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "chunks_processed": self.chunks_processed,
+            "chunks_dropped": self.chunks_dropped,
+            "seconds_processed": round(self.seconds_processed, 2),
+            "seconds_skipped": round(self.seconds_skipped, 2),
+            "skipped_ratio": round(self.seconds_skipped / self.seconds_processed, 3) if self.seconds_processed else 0.0
+        }